@@ -13,11 +13,66 @@
 # ==============================================================================
 
 import logging
-import re
-from urllib.parse import urlparse
+
+from domain_utils import extract_domain_from_url
+from token_matcher import TokenMatcher
 
 logger = logging.getLogger(__name__)
 
+# Common tracking cookie name fragments (matched anywhere in the name)
+TRACKING_COOKIE_TOKENS = frozenset({
+    "_ga",  # Google Analytics
+    "_gid",
+    "_gat",
+    "fbp",  # Facebook
+    "fbm",
+    "fr",
+    "_fbq",
+    "doubleclick",
+    "adsystem",
+    "scorecard",
+    "adnxs",
+    "pubmatic",
+    "rubiconproject",
+    "criteo",
+    "outbrain",
+    "taboola",
+})
+
+
+def parse_set_cookie_name(header):
+    """Return the cookie name of a Set-Cookie header value"""
+    eq = header.find("=")
+    return (header[:eq] if eq != -1 else header).strip()
+
+
+def _parse_cookie_header(header):
+    """Yield (start, name, eq, end) for each name=value pair in a raw Cookie header
+
+    Works on the header bytes with find() instead of split() so only the name
+    is sliced; the value stays as header[eq + 1:end] and the whole pair as
+    header[start:end] until a caller needs them.
+    """
+    length = len(header)
+    i = 0
+    while i < length:
+        semi = header.find(b";", i)
+        if semi == -1:
+            semi = length
+
+        eq = header.find(b"=", i, semi)
+        if eq != -1:
+            # Trim surrounding whitespace off the pair without copying it
+            start = i
+            while start < eq and header[start] in b" \t":
+                start += 1
+            end = semi
+            while end > eq + 1 and header[end - 1] in b" \t":
+                end -= 1
+            yield start, header[start:eq].rstrip(), eq, end
+
+        i = semi + 1
+
 
 class CookieInterceptor:
     """Intercepts and blocks cookies, logs tracking attempts"""
@@ -28,167 +83,206 @@ class CookieInterceptor:
         self.blocked_count = 0
         self.logged_count = 0
 
-        # Common tracking cookie patterns
-        self.tracking_patterns = [
-            r".*_ga.*",  # Google Analytics
-            r".*_gid.*",
-            r".*_gat.*",
-            r".*fbp.*",  # Facebook
-            r".*fbm.*",
-            r".*fr.*",
-            r".*_fbq.*",
-            r".*doubleclick.*",
-            r".*adsystem.*",
-            r".*scorecard.*",
-            r".*adnxs.*",
-            r".*pubmatic.*",
-            r".*rubiconproject.*",
-            r".*criteo.*",
-            r".*outbrain.*",
-            r".*taboola.*",
-        ]
-
-    def should_block_cookie(self, domain, cookie_name):
-        """Determine if cookie should be blocked"""
-
-        # Check whitelist first
+        self.tracking_tokens = TRACKING_COOKIE_TOKENS
+
+        # Multi-token matcher (Aho-Corasick when pyahocorasick is installed)
+        self._tracker_matcher = TokenMatcher(self.tracking_tokens)
+
+        # should_block_cookie(domain, cookie_name): block_all is fixed for the
+        # proxy's lifetime, so the matching check is picked once here
+        if self.config.get("cookies", {}).get("block_all", True):
+            self.should_block_cookie = self._block_all
+        else:
+            self.should_block_cookie = self._block_trackers
+
+    def _block_all(self, domain, cookie_name):
+        """Block every cookie unless the domain is whitelisted"""
         if self.db.is_whitelisted(domain):
-            logger.debug(f"Domain {domain} is whitelisted, allowing cookie")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Domain {domain} is whitelisted, allowing cookie")
             return False
+        return True
 
-        # Check config
-        if self.config.get("cookies", {}).get("block_all", True):
+    def _block_trackers(self, domain, cookie_name):
+        """Block only cookies whose name matches a tracking token"""
+        if self.db.is_whitelisted(domain):
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Domain {domain} is whitelisted, allowing cookie")
+            return False
+
+        # Check if cookie matches tracking tokens; exact names skip the scan
+        name_l = cookie_name.lower()
+        if name_l in TRACKING_COOKIE_TOKENS:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Cookie {cookie_name} matches tracking token: {name_l}")
             return True
 
-        # Check if cookie matches tracking patterns
-        for pattern in self.tracking_patterns:
-            if re.match(pattern, cookie_name, re.IGNORECASE):
-                logger.debug(f"Cookie {cookie_name} matches tracking pattern: {pattern}")
-                return True
+        token = self._tracker_matcher.search_lower(name_l)
+        if token:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Cookie {cookie_name} matches tracking token: {token}")
+            return True
 
         return False
 
     def extract_domain_from_url(self, url):
         """Extract domain from URL"""
-        try:
-            parsed = urlparse(url)
-            return parsed.netloc or parsed.path.split("/")[0]
-        except Exception as e:
-            logger.error(f"Error extracting domain from {url}: {e}")
-            return url
+        return extract_domain_from_url(url)
 
-    def process_request_cookies(self, flow):
-        """Process cookies in request, block if needed"""
+    def _flow_domain(self, flow, url):
+        """Get the flow's domain, computed once and reused for the response"""
+        domain = flow.metadata.get("_interceptor_domain")
+        if domain is None:
+            domain = flow.metadata["_interceptor_domain"] = extract_domain_from_url(url)
+        return domain
+
+    def process_request_cookies(self, flow, domain=None):
+        """Process cookies in request, block if needed
+
+        domain: the request's domain, when the caller has already extracted it
+        """
         try:
             url = flow.request.pretty_url
-            domain = self.extract_domain_from_url(url)
+            if domain is None:
+                domain = self._flow_domain(flow, url)
+            else:
+                flow.metadata["_interceptor_domain"] = domain
             ip_address = flow.server_conn.address[0] if flow.server_conn else None
 
-            cookie_header = flow.request.headers.get("Cookie", "")
-
-            if not cookie_header:
+            # Raw header bytes, so the header is never decoded and re-encoded
+            cookie_fields = [
+                value for name, value in flow.request.headers.fields if name.lower() == b"cookie"
+            ]
+            if not cookie_fields:
                 return
-
-            # Parse cookies
-            cookies = {}
-            for cookie in cookie_header.split(";"):
-                if "=" in cookie:
-                    name, value = cookie.strip().split("=", 1)
-                    cookies[name] = value
+            cookie_header = cookie_fields[0] if len(cookie_fields) == 1 else b"; ".join(cookie_fields)
 
             blocked_cookies = []
-
-            for cookie_name, cookie_value in cookies.items():
-                should_block = self.should_block_cookie(domain, cookie_name)
-
-                # Log to database
-                if self.config.get("cookies", {}).get("log_attempts", True):
-                    self.db.log_cookie_traffic(
-                        domain, cookie_name, cookie_value[:100], ip_address, url, should_block
-                    )
-                    self.logged_count += 1
+            remaining_cookies = []
+            log_rows = []
+
+            # Read config once per header rather than once per cookie
+            cookie_config = self.config.get("cookies", {})
+            log_cookies = cookie_config.get("log_attempts", True)
+            auto_block = cookie_config.get("auto_block_trackers", True)
+
+            # Bind per-cookie lookups once; this loop runs for every cookie
+            should_block_cookie = self.should_block_cookie
+            add_log_row = log_rows.append
+            add_blocked = blocked_cookies.append
+            add_remaining = remaining_cookies.append
+
+            for start, name_bytes, eq, end in _parse_cookie_header(cookie_header):
+                # Cookie names are ASCII tokens; latin-1 never fails to decode
+                cookie_name = name_bytes.decode("latin-1")
+                should_block = should_block_cookie(domain, cookie_name)
+
+                # Queue for database logging
+                if log_cookies:
+                    cookie_value = cookie_header[eq + 1:min(end, eq + 101)].decode("utf-8", "replace")
+                    add_log_row((domain, cookie_name, cookie_value, ip_address, url, should_block))
 
                 if should_block:
-                    blocked_cookies.append(cookie_name)
-                    self.blocked_count += 1
+                    add_blocked(cookie_name)
+                else:
+                    # Original bytes of the pair, so signed values survive untouched
+                    add_remaining(cookie_header[start:end])
 
-                    # Track this domain
-                    if self.config.get("cookies", {}).get("auto_block_trackers", True):
-                        self.db.add_tracking_domain(domain, "cookie-tracker")
-                        if ip_address:
-                            self.db.add_tracking_ip(ip_address, domain)
+            self.blocked_count += len(blocked_cookies)
+            self._write_flow_results(domain, ip_address, log_rows, len(blocked_cookies), auto_block)
 
             # Remove blocked cookies from request
             if blocked_cookies:
-                remaining_cookies = [
-                    f"{k}={v}" for k, v in cookies.items() if k not in blocked_cookies
-                ]
                 if remaining_cookies:
-                    flow.request.headers["Cookie"] = "; ".join(remaining_cookies)
+                    flow.request.headers.set_all("Cookie", [b"; ".join(remaining_cookies)])
                 else:
                     # Remove cookie header entirely if all blocked
                     flow.request.headers.pop("Cookie", None)
 
-                logger.info(f"Blocked {len(blocked_cookies)} cookies from {domain}")
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info(f"Blocked {len(blocked_cookies)} cookies from {domain}")
 
         except Exception as e:
             logger.error(f"Error processing request cookies: {e}")
 
     def process_response_cookies(self, flow):
-        """Process Set-Cookie headers in response, block if needed"""
+        """Process Set-Cookie headers in response, block if needed
+
+        Returns a list of (cookie_name, blocked) for every Set-Cookie header.
+        """
+        results = []
         try:
             url = flow.request.pretty_url
-            domain = self.extract_domain_from_url(url)
+            domain = self._flow_domain(flow, url)
             ip_address = flow.server_conn.address[0] if flow.server_conn else None
 
             # Get all Set-Cookie headers
             set_cookie_headers = flow.response.headers.get_all("Set-Cookie")
 
             if not set_cookie_headers:
-                return
+                return results
 
-            blocked_cookies = []
+            kept_headers = []
+            blocked = 0
+            log_rows = []
+
+            # Read config once per response rather than once per header
+            cookie_config = self.config.get("cookies", {})
+            log_cookies = cookie_config.get("log_attempts", True)
+            auto_block = cookie_config.get("auto_block_trackers", True)
 
             for cookie_header in set_cookie_headers:
-                # Parse cookie name
-                cookie_name = cookie_header.split("=")[0].strip()
-                cookie_value = cookie_header.split("=")[1].split(";")[0] if "=" in cookie_header else ""
+                # Parse cookie name (the value is only needed for logging)
+                cookie_name = parse_set_cookie_name(cookie_header)
 
                 should_block = self.should_block_cookie(domain, cookie_name)
-
-                # Log to database
-                if self.config.get("cookies", {}).get("log_attempts", True):
-                    self.db.log_cookie_traffic(
-                        domain, cookie_name, cookie_value[:100], ip_address, url, should_block
+                results.append((cookie_name, should_block))
+
+                # Queue for database logging; value ends at the first attribute
+                if log_cookies:
+                    eq = cookie_header.find("=")
+                    if eq != -1:
+                        semi = cookie_header.find(";", eq + 1, eq + 101)
+                        cookie_value = cookie_header[eq + 1:semi if semi != -1 else eq + 101]
+                    else:
+                        cookie_value = ""
+                    log_rows.append(
+                        (domain, cookie_name, cookie_value, ip_address, url, should_block)
                     )
-                    self.logged_count += 1
 
                 if should_block:
-                    blocked_cookies.append(cookie_header)
-                    self.blocked_count += 1
+                    blocked += 1
+                else:
+                    kept_headers.append(cookie_header)
 
-                    # Track this domain
-                    if self.config.get("cookies", {}).get("auto_block_trackers", True):
-                        self.db.add_tracking_domain(domain, "cookie-tracker")
-                        if ip_address:
-                            self.db.add_tracking_ip(ip_address, domain)
+            self.blocked_count += blocked
+            self._write_flow_results(domain, ip_address, log_rows, blocked, auto_block)
 
             # Remove blocked Set-Cookie headers
-            if blocked_cookies:
-                # Remove all Set-Cookie headers first
-                while "Set-Cookie" in flow.response.headers:
-                    flow.response.headers.pop("Set-Cookie")
+            if blocked:
+                # Replace all Set-Cookie headers with the kept ones in one pass
+                flow.response.headers.set_all("Set-Cookie", kept_headers)
 
-                # Re-add only non-blocked ones
-                for cookie_header in set_cookie_headers:
-                    if cookie_header not in blocked_cookies:
-                        flow.response.headers.add("Set-Cookie", cookie_header)
-
-                logger.info(f"Blocked {len(blocked_cookies)} Set-Cookie headers from {domain}")
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info(f"Blocked {blocked} Set-Cookie headers from {domain}")
 
         except Exception as e:
             logger.error(f"Error processing response cookies: {e}")
 
+        return results
+
+    def _write_flow_results(self, domain, ip_address, log_rows, blocked, auto_block):
+        """Write all database updates for one flow as one batch per table"""
+        if log_rows:
+            self.db.log_cookie_traffic_many(log_rows)
+            self.logged_count += len(log_rows)
+
+        # Track this domain, one hit per blocked cookie
+        if blocked and auto_block:
+            self.db.add_tracking_domains_many([(domain, "cookie-tracker")] * blocked)
+            if ip_address:
+                self.db.add_tracking_ips_many([(ip_address, domain)] * blocked)
+
     def get_stats(self):
         """Get cookie blocking statistics"""
         return {
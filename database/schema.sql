@@ -99,3 +99,10 @@ CREATE INDEX IF NOT EXISTS idx_cookie_traffic_domain ON cookie_traffic(domain);
 CREATE INDEX IF NOT EXISTS idx_cookie_traffic_timestamp ON cookie_traffic(timestamp);
 CREATE INDEX IF NOT EXISTS idx_request_log_timestamp ON request_log(timestamp);
 CREATE INDEX IF NOT EXISTS idx_request_log_host ON request_log(host);
+
+-- Partial covering indexes: "top blocked by hits" listings walk these in order
+-- (blocked is repeated as a column so SQLite can answer from the index alone)
+CREATE INDEX IF NOT EXISTS idx_tracking_domains_blocked_hits
+    ON tracking_domains(hit_count DESC, domain, category, blocked) WHERE blocked = 1;
+CREATE INDEX IF NOT EXISTS idx_tracking_ips_blocked_hits
+    ON tracking_ips(hit_count DESC, ip_address, associated_domain, blocked) WHERE blocked = 1;
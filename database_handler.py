@@ -14,28 +14,170 @@
 
 import sqlite3
 import logging
+import queue
+from collections import Counter
 from datetime import datetime
 from pathlib import Path
 import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+# Whitelist / block-status lookups are cached in-process for this long (seconds)
+LOOKUP_CACHE_TTL = 60.0
+LOOKUP_CACHE_MAX_ENTRIES = 10000
+
+# Background log writer: queue bound, rows per transaction, max wait per batch
+WRITE_QUEUE_SIZE = 10000
+WRITE_BATCH_SIZE = 500
+WRITE_FLUSH_INTERVAL = 0.05
+
+# Rows fetched per round trip when streaming the blocklist
+BLOCKLIST_FETCH_SIZE = 1000
+
+_STOP = object()
+_HITS = object()
+
+# SQL is kept in module constants so every call hits sqlite3's statement cache
+_SQL_LOG_COOKIE = (
+    "INSERT INTO cookie_traffic"
+    " (domain, cookie_name, cookie_value, ip_address, request_url, blocked)"
+    " VALUES (?, ?, ?, ?, ?, ?)"
+)
+_SQL_LOG_FINGERPRINT = (
+    "INSERT INTO fingerprint_rotations"
+    " (user_agent, platform, accept_language, accept_encoding, rotation_trigger)"
+    " VALUES (?, ?, ?, ?, ?)"
+)
+_SQL_LOG_REQUEST = (
+    "INSERT INTO request_log"
+    " (method, url, host, ip_address, fingerprint_id, blocked, block_reason)"
+    " VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+_SQL_UPSERT_DOMAIN = (
+    "INSERT INTO tracking_domains (domain, category, hit_count, last_seen)"
+    " VALUES (?, ?, 1, CURRENT_TIMESTAMP)"
+    " ON CONFLICT(domain) DO UPDATE SET"
+    " hit_count = hit_count + 1, last_seen = CURRENT_TIMESTAMP"
+)
+_SQL_UPSERT_IP = (
+    "INSERT INTO tracking_ips (ip_address, associated_domain, hit_count, last_seen)"
+    " VALUES (?, ?, 1, CURRENT_TIMESTAMP)"
+    " ON CONFLICT(ip_address) DO UPDATE SET"
+    " hit_count = hit_count + 1, last_seen = CURRENT_TIMESTAMP"
+)
+_SQL_ADD_DOMAIN_HITS = (
+    "INSERT INTO tracking_domains (domain, category, hit_count, last_seen)"
+    " VALUES (?, ?, ?, CURRENT_TIMESTAMP)"
+    " ON CONFLICT(domain) DO UPDATE SET"
+    " hit_count = hit_count + excluded.hit_count, last_seen = CURRENT_TIMESTAMP"
+)
+_SQL_ADD_IP_HITS = (
+    "INSERT INTO tracking_ips (ip_address, associated_domain, hit_count, last_seen)"
+    " VALUES (?, ?, ?, CURRENT_TIMESTAMP)"
+    " ON CONFLICT(ip_address) DO UPDATE SET"
+    " hit_count = hit_count + excluded.hit_count, last_seen = CURRENT_TIMESTAMP"
+)
+_SQL_UPSERT_DOMAIN_HITS = _SQL_UPSERT_DOMAIN + " RETURNING hit_count"
+_SQL_UPSERT_IP_HITS = _SQL_UPSERT_IP + " RETURNING hit_count"
+_SQL_DOMAIN_BLOCKED = "SELECT blocked FROM tracking_domains WHERE domain = ?"
+_SQL_IP_BLOCKED = "SELECT blocked FROM tracking_ips WHERE ip_address = ?"
+_SQL_WHITELISTED = "SELECT COUNT(*) FROM whitelist WHERE domain = ?"
+# Whitelist wins, so its branch comes first
+_SQL_CLASSIFY_DOMAIN = (
+    "SELECT 'white' FROM whitelist WHERE domain = ?1"
+    " UNION ALL SELECT 'block' FROM tracking_domains WHERE domain = ?1 AND blocked = 1"
+    " LIMIT 1"
+)
+_SQL_ADD_WHITELIST = "INSERT OR IGNORE INTO whitelist (domain, reason) VALUES (?, ?)"
+_SQL_BLOCKED_DOMAINS = "SELECT domain FROM tracking_domains WHERE blocked = 1"
+_SQL_BLOCKED_IPS = "SELECT ip_address FROM tracking_ips WHERE blocked = 1"
+_SQL_COUNT_BLOCKED_DOMAINS = "SELECT COUNT(*) FROM tracking_domains WHERE blocked = 1"
+_SQL_COUNT_BLOCKED_IPS = "SELECT COUNT(*) FROM tracking_ips WHERE blocked = 1"
+_SQL_BLOCKLIST = (
+    "SELECT 'd', domain FROM tracking_domains WHERE blocked = 1"
+    " UNION ALL SELECT 'i', ip_address FROM tracking_ips WHERE blocked = 1"
+)
+_SQL_STATISTICS = (
+    "SELECT"
+    " (SELECT COUNT(*) FROM tracking_domains WHERE blocked = 1),"
+    " (SELECT COUNT(*) FROM tracking_ips WHERE blocked = 1),"
+    " (SELECT COUNT(*) FROM cookie_traffic WHERE blocked = 1),"
+    " (SELECT COUNT(*) FROM request_log),"
+    " (SELECT COUNT(*) FROM fingerprint_rotations)"
+)
+_STATISTICS_KEYS = (
+    "blocked_domains",
+    "blocked_ips",
+    "blocked_cookies",
+    "total_requests",
+    "fingerprint_rotations",
+)
+_SQL_ADD_DIARY = (
+    "INSERT INTO diary_entries (entry_type, title, content, agent_id)"
+    " VALUES (?, ?, ?, ?)"
+)
+
 
 class DatabaseHandler:
     """Handles all database operations for privacy tracking"""
 
-    def __init__(self, db_path):
+    def __init__(self, db_path, write_batch_size=WRITE_BATCH_SIZE, flush_interval=WRITE_FLUSH_INTERVAL):
         self.db_path = db_path
         self.local = threading.local()
+        self._whitelist_cache = {}
+        self._domain_blocked_cache = {}
+        self._ip_blocked_cache = {}
+        self._domain_class_cache = {}
+
+        # Log writes are queued and committed in batches by a writer thread
+        self._write_queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self.write_batch_size = write_batch_size
+        self.flush_interval = flush_interval
+        self.dropped_writes = 0
+        self.last_fingerprint_id = None
+
+        # Tracking hits are summed in memory and written once per writer batch
+        self._domain_hits = Counter()
+        self._ip_hits = Counter()
+        self._hits_lock = threading.Lock()
+
         self._init_database()
 
     def _get_connection(self):
         """Get thread-local database connection"""
         if not hasattr(self.local, "conn"):
-            self.local.conn = sqlite3.connect(self.db_path)
-            self.local.conn.row_factory = sqlite3.Row
+            # Only TEXT/INTEGER values are bound, so converter lookups are off;
+            # rows stay plain tuples since every caller reads columns by position
+            conn = sqlite3.connect(self.db_path, detect_types=0, cached_statements=256)
+
+            # WAL lets readers run alongside the writer and makes commits an
+            # append instead of a journal rewrite + fsync
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA mmap_size=268435456")
+            conn.execute("PRAGMA cache_size=-65536")
+            conn.execute("PRAGMA busy_timeout=5000")
+
+            self.local.conn = conn
         return self.local.conn
 
+    def _cached_lookup(self, cache, key, lookup):
+        """Return lookup(key), reusing a cached result until it expires"""
+        now = time.monotonic()
+        hit = cache.get(key)
+        if hit is not None and hit[1] > now:
+            return hit[0]
+
+        value = lookup(key)
+        if len(cache) >= LOOKUP_CACHE_MAX_ENTRIES:
+            cache.clear()
+        cache[key] = (value, now + LOOKUP_CACHE_TTL)
+        return value
+
     def _init_database(self):
         """Initialize database with schema"""
         try:
@@ -58,32 +200,131 @@ class DatabaseHandler:
             logger.error(f"Error initializing database: {e}")
             raise
 
+    def _ensure_writer(self):
+        """Start the background writer thread on first use"""
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(
+                        target=self._drain_writes, name="db-writer", daemon=True
+                    )
+                    self._writer.start()
+
+    def _enqueue_write(self, sql, rows):
+        """Queue rows for the writer thread, dropping them if the queue is full"""
+        self._ensure_writer()
+        try:
+            self._write_queue.put_nowait((sql, rows))
+        except queue.Full:
+            self.dropped_writes += 1
+            if self.dropped_writes == 1 or self.dropped_writes % 1000 == 0:
+                logger.warning(f"Database write queue full, dropped {self.dropped_writes} batches")
+
+    def _drain_writes(self):
+        """Writer thread: commit queued rows in batches until stopped"""
+        conn = self._get_connection()
+        stopping = False
+        while not stopping:
+            item = self._write_queue.get()
+            batch = []
+            taken = 1
+            if item is _STOP:
+                stopping = True
+            elif item is not _HITS:
+                batch.append(item)
+
+            # Collect more work until the batch is full or the interval passes
+            deadline = time.monotonic() + self.flush_interval
+            while not stopping and len(batch) < self.write_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._write_queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                taken += 1
+                if item is _STOP:
+                    stopping = True
+                elif item is not _HITS:
+                    batch.append(item)
+
+            domain_hits, ip_hits = self._take_hits()
+            try:
+                if batch or domain_hits or ip_hits:
+                    # One executemany per statement covers the whole batch
+                    grouped = {}
+                    for sql, rows in batch:
+                        grouped.setdefault(sql, []).extend(rows)
+                    with conn:
+                        for sql, rows in grouped.items():
+                            conn.executemany(sql, rows)
+                        if domain_hits:
+                            conn.executemany(
+                                _SQL_ADD_DOMAIN_HITS,
+                                [(domain, category, n) for (domain, category), n in domain_hits.items()],
+                            )
+                        if ip_hits:
+                            conn.executemany(
+                                _SQL_ADD_IP_HITS,
+                                [(ip, associated_domain, n) for (ip, associated_domain), n in ip_hits.items()],
+                            )
+                    for domain, _ in domain_hits:
+                        self._domain_blocked_cache.pop(domain, None)
+                        self._domain_class_cache.pop(domain, None)
+                    for ip_address, _ in ip_hits:
+                        self._ip_blocked_cache.pop(ip_address, None)
+            except Exception as e:
+                logger.error(f"Error writing queued rows: {e}")
+            finally:
+                for _ in range(taken):
+                    self._write_queue.task_done()
+
+        conn.close()
+        del self.local.conn
+
+    def _take_hits(self):
+        """Swap out the pending hit counters"""
+        with self._hits_lock:
+            domain_hits, self._domain_hits = self._domain_hits, Counter()
+            ip_hits, self._ip_hits = self._ip_hits, Counter()
+        return domain_hits, ip_hits
+
+    def _add_hits(self, domain_rows=(), ip_rows=()):
+        """Add rows to the hit counters, waking the writer if they were empty"""
+        self._ensure_writer()
+        with self._hits_lock:
+            wake = not self._domain_hits and not self._ip_hits
+            self._domain_hits.update(domain_rows)
+            self._ip_hits.update(ip_rows)
+        if wake:
+            try:
+                self._write_queue.put_nowait(_HITS)
+            except queue.Full:
+                pass  # The writer is busy and drains the counters with its next batch
+
+    def flush(self):
+        """Block until all queued writes are committed"""
+        if self._writer is not None:
+            self._write_queue.join()
+
     def log_cookie_traffic(self, domain, cookie_name, cookie_value, ip_address, url, blocked=True):
         """Log cookie traffic attempt"""
-        try:
-            conn = self._get_connection()
-            conn.execute(
-                """
-                INSERT INTO cookie_traffic
-                (domain, cookie_name, cookie_value, ip_address, request_url, blocked)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                (domain, cookie_name, cookie_value, ip_address, url, blocked),
-            )
-            conn.commit()
-        except Exception as e:
-            logger.error(f"Error logging cookie traffic: {e}")
+        self.log_cookie_traffic_many([(domain, cookie_name, cookie_value, ip_address, url, blocked)])
+
+    def log_cookie_traffic_many(self, rows):
+        """Queue a batch of cookie traffic attempts for the writer thread
+
+        rows: iterable of (domain, cookie_name, cookie_value, ip_address, url, blocked)
+        """
+        self._enqueue_write(_SQL_LOG_COOKIE, list(rows))
 
     def log_fingerprint_rotation(self, fingerprint):
         """Log fingerprint rotation"""
         try:
             conn = self._get_connection()
             cursor = conn.execute(
-                """
-                INSERT INTO fingerprint_rotations
-                (user_agent, platform, accept_language, accept_encoding, rotation_trigger)
-                VALUES (?, ?, ?, ?, ?)
-                """,
+                _SQL_LOG_FINGERPRINT,
                 (
                     fingerprint.get("user_agent"),
                     fingerprint.get("platform"),
@@ -93,48 +334,29 @@ class DatabaseHandler:
                 ),
             )
             conn.commit()
-            return cursor.lastrowid
+            self.last_fingerprint_id = cursor.lastrowid
+            return self.last_fingerprint_id
         except Exception as e:
             logger.error(f"Error logging fingerprint rotation: {e}")
             return None
 
     def log_request(self, method, url, host, ip_address, fingerprint_id, blocked=False, block_reason=None):
         """Log HTTP request"""
-        try:
-            conn = self._get_connection()
-            conn.execute(
-                """
-                INSERT INTO request_log
-                (method, url, host, ip_address, fingerprint_id, blocked, block_reason)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
-                (method, url, host, ip_address, fingerprint_id, blocked, block_reason),
-            )
-            conn.commit()
-        except Exception as e:
-            logger.error(f"Error logging request: {e}")
+        self._enqueue_write(
+            _SQL_LOG_REQUEST,
+            [(method, url, host, ip_address, fingerprint_id, blocked, block_reason)],
+        )
 
     def add_tracking_domain(self, domain, category="tracker"):
         """Add or update tracking domain"""
         try:
             conn = self._get_connection()
-            conn.execute(
-                """
-                INSERT INTO tracking_domains (domain, category, hit_count, last_seen)
-                VALUES (?, ?, 1, CURRENT_TIMESTAMP)
-                ON CONFLICT(domain) DO UPDATE SET
-                    hit_count = hit_count + 1,
-                    last_seen = CURRENT_TIMESTAMP
-                """,
-                (domain, category),
-            )
-            conn.commit()
+            with conn:
+                row = conn.execute(_SQL_UPSERT_DOMAIN_HITS, (domain, category)).fetchone()
+            self._domain_blocked_cache.pop(domain, None)
+            self._domain_class_cache.pop(domain, None)
 
             # Check if domain should be auto-blocked
-            cursor = conn.execute(
-                "SELECT hit_count FROM tracking_domains WHERE domain = ?", (domain,)
-            )
-            row = cursor.fetchone()
             if row and row[0] >= 3:  # Auto-block threshold
                 logger.info(f"Auto-blocking domain: {domain} (hits: {row[0]})")
                 return True
@@ -148,23 +370,11 @@ class DatabaseHandler:
         """Add or update tracking IP"""
         try:
             conn = self._get_connection()
-            conn.execute(
-                """
-                INSERT INTO tracking_ips (ip_address, associated_domain, hit_count, last_seen)
-                VALUES (?, ?, 1, CURRENT_TIMESTAMP)
-                ON CONFLICT(ip_address) DO UPDATE SET
-                    hit_count = hit_count + 1,
-                    last_seen = CURRENT_TIMESTAMP
-                """,
-                (ip_address, associated_domain),
-            )
-            conn.commit()
+            with conn:
+                row = conn.execute(_SQL_UPSERT_IP_HITS, (ip_address, associated_domain)).fetchone()
+            self._ip_blocked_cache.pop(ip_address, None)
 
             # Check if IP should be auto-blocked
-            cursor = conn.execute(
-                "SELECT hit_count FROM tracking_ips WHERE ip_address = ?", (ip_address,)
-            )
-            row = cursor.fetchone()
             if row and row[0] >= 3:  # Auto-block threshold
                 logger.info(f"Auto-blocking IP: {ip_address} (hits: {row[0]})")
                 return True
@@ -174,13 +384,37 @@ class DatabaseHandler:
             logger.error(f"Error adding tracking IP: {e}")
             return False
 
+    def add_tracking_domains_many(self, rows):
+        """Count hits for a batch of tracking domains
+
+        rows: iterable of (domain, category); repeated domains count one hit each.
+        Hits are summed in memory and upserted by the writer thread.
+        """
+        try:
+            self._add_hits(domain_rows=rows)
+        except Exception as e:
+            logger.error(f"Error adding tracking domains: {e}")
+
+    def add_tracking_ips_many(self, rows):
+        """Count hits for a batch of tracking IPs
+
+        rows: iterable of (ip_address, associated_domain); repeated IPs count one hit each.
+        Hits are summed in memory and upserted by the writer thread.
+        """
+        try:
+            self._add_hits(ip_rows=rows)
+        except Exception as e:
+            logger.error(f"Error adding tracking IPs: {e}")
+
     def is_domain_blocked(self, domain):
         """Check if domain is blocked"""
+        return self._cached_lookup(self._domain_blocked_cache, domain, self._query_domain_blocked)
+
+    def _query_domain_blocked(self, domain):
+        """Look up domain block status in the database"""
         try:
             conn = self._get_connection()
-            cursor = conn.execute(
-                "SELECT blocked FROM tracking_domains WHERE domain = ?", (domain,)
-            )
+            cursor = conn.execute(_SQL_DOMAIN_BLOCKED, (domain,))
             row = cursor.fetchone()
             return row[0] if row else False
         except Exception as e:
@@ -189,11 +423,13 @@ class DatabaseHandler:
 
     def is_ip_blocked(self, ip_address):
         """Check if IP is blocked"""
+        return self._cached_lookup(self._ip_blocked_cache, ip_address, self._query_ip_blocked)
+
+    def _query_ip_blocked(self, ip_address):
+        """Look up IP block status in the database"""
         try:
             conn = self._get_connection()
-            cursor = conn.execute(
-                "SELECT blocked FROM tracking_ips WHERE ip_address = ?", (ip_address,)
-            )
+            cursor = conn.execute(_SQL_IP_BLOCKED, (ip_address,))
             row = cursor.fetchone()
             return row[0] if row else False
         except Exception as e:
@@ -202,36 +438,60 @@ class DatabaseHandler:
 
     def is_whitelisted(self, domain):
         """Check if domain is whitelisted"""
+        return self._cached_lookup(self._whitelist_cache, domain, self._query_whitelisted)
+
+    def _query_whitelisted(self, domain):
+        """Look up domain in the whitelist table"""
         try:
             conn = self._get_connection()
-            cursor = conn.execute(
-                "SELECT COUNT(*) FROM whitelist WHERE domain = ?", (domain,)
-            )
+            cursor = conn.execute(_SQL_WHITELISTED, (domain,))
             return cursor.fetchone()[0] > 0
         except Exception as e:
             logger.error(f"Error checking whitelist: {e}")
             return False
 
+    def classify_domain(self, domain):
+        """Return "white" if domain is whitelisted, "block" if it is blocked, else None"""
+        return self._cached_lookup(self._domain_class_cache, domain, self._query_domain_class)
+
+    def _query_domain_class(self, domain):
+        """Look up domain in the whitelist and blocklist with one query"""
+        try:
+            conn = self._get_connection()
+            row = conn.execute(_SQL_CLASSIFY_DOMAIN, (domain,)).fetchone()
+            return row[0] if row else None
+        except Exception as e:
+            logger.error(f"Error classifying domain: {e}")
+            return None
+
     def add_to_whitelist(self, domain, reason=""):
         """Add domain to whitelist"""
+        if self.add_to_whitelist_many([(domain, reason)]):
+            logger.info(f"Added {domain} to whitelist")
+
+    def add_to_whitelist_many(self, rows):
+        """Add a batch of domains to whitelist in a single transaction
+
+        rows: iterable of (domain, reason); returns True on success
+        """
         try:
+            rows = list(rows)
             conn = self._get_connection()
-            conn.execute(
-                "INSERT OR IGNORE INTO whitelist (domain, reason) VALUES (?, ?)",
-                (domain, reason),
-            )
-            conn.commit()
-            logger.info(f"Added {domain} to whitelist")
+            with conn:
+                conn.executemany(_SQL_ADD_WHITELIST, rows)
+            for domain, _ in rows:
+                self._whitelist_cache.pop(domain, None)
+                self._domain_class_cache.pop(domain, None)
+            return True
         except Exception as e:
             logger.error(f"Error adding to whitelist: {e}")
+            return False
 
     def get_blocked_domains(self):
         """Get list of all blocked domains"""
         try:
             conn = self._get_connection()
-            cursor = conn.execute(
-                "SELECT domain FROM tracking_domains WHERE blocked = 1"
-            )
+            cursor = conn.execute(_SQL_BLOCKED_DOMAINS)
             return [row[0] for row in cursor.fetchall()]
         except Exception as e:
             logger.error(f"Error getting blocked domains: {e}")
@@ -241,36 +501,49 @@ class DatabaseHandler:
         """Get list of all blocked IPs"""
         try:
             conn = self._get_connection()
-            cursor = conn.execute(
-                "SELECT ip_address FROM tracking_ips WHERE blocked = 1"
-            )
+            cursor = conn.execute(_SQL_BLOCKED_IPS)
             return [row[0] for row in cursor.fetchall()]
         except Exception as e:
             logger.error(f"Error getting blocked IPs: {e}")
             return []
 
-    def get_statistics(self):
-        """Get database statistics"""
+    def count_blocked_domains(self):
+        """Get the number of blocked domains"""
         try:
             conn = self._get_connection()
-            stats = {}
-
-            cursor = conn.execute("SELECT COUNT(*) FROM tracking_domains WHERE blocked = 1")
-            stats["blocked_domains"] = cursor.fetchone()[0]
-
-            cursor = conn.execute("SELECT COUNT(*) FROM tracking_ips WHERE blocked = 1")
-            stats["blocked_ips"] = cursor.fetchone()[0]
-
-            cursor = conn.execute("SELECT COUNT(*) FROM cookie_traffic WHERE blocked = 1")
-            stats["blocked_cookies"] = cursor.fetchone()[0]
+            return conn.execute(_SQL_COUNT_BLOCKED_DOMAINS).fetchone()[0]
+        except Exception as e:
+            logger.error(f"Error counting blocked domains: {e}")
+            return 0
 
-            cursor = conn.execute("SELECT COUNT(*) FROM request_log")
-            stats["total_requests"] = cursor.fetchone()[0]
+    def count_blocked_ips(self):
+        """Get the number of blocked IPs"""
+        try:
+            conn = self._get_connection()
+            return conn.execute(_SQL_COUNT_BLOCKED_IPS).fetchone()[0]
+        except Exception as e:
+            logger.error(f"Error counting blocked IPs: {e}")
+            return 0
 
-            cursor = conn.execute("SELECT COUNT(*) FROM fingerprint_rotations")
-            stats["fingerprint_rotations"] = cursor.fetchone()[0]
+    def iter_blocklist(self):
+        """Yield ("d", domain) for every blocked domain, then ("i", ip) for every blocked IP"""
+        try:
+            conn = self._get_connection()
+            cursor = conn.execute(_SQL_BLOCKLIST)
+            while True:
+                rows = cursor.fetchmany(BLOCKLIST_FETCH_SIZE)
+                if not rows:
+                    break
+                yield from rows
+        except Exception as e:
+            logger.error(f"Error reading blocklist: {e}")
 
-            return stats
+    def get_statistics(self):
+        """Get database statistics"""
+        try:
+            conn = self._get_connection()
+            row = conn.execute(_SQL_STATISTICS).fetchone()
+            return dict(zip(_STATISTICS_KEYS, row))
 
         except Exception as e:
             logger.error(f"Error getting statistics: {e}")
@@ -280,19 +553,18 @@ class DatabaseHandler:
         """Add development diary entry"""
         try:
             conn = self._get_connection()
-            conn.execute(
-                """
-                INSERT INTO diary_entries (entry_type, title, content, agent_id)
-                VALUES (?, ?, ?, ?)
-                """,
-                (entry_type, title, content, agent_id),
-            )
+            conn.execute(_SQL_ADD_DIARY, (entry_type, title, content, agent_id))
             conn.commit()
         except Exception as e:
             logger.error(f"Error adding diary entry: {e}")
 
     def close(self):
-        """Close database connection"""
+        """Flush queued writes, stop the writer and close database connection"""
+        if self._writer is not None:
+            self._write_queue.put(_STOP)
+            self._writer.join()
+            self._writer = None
+
         if hasattr(self.local, "conn"):
             self.local.conn.close()
             del self.local.conn
@@ -0,0 +1,35 @@
+# ==============================================================================
+# file_id: SOM-SCR-0016-v1.0.0
+# name: domain_utils.py
+# description: Request domain extraction shared by the proxy modules
+# project_id: BROWSER-MIXER-ANON
+# category: script
+# tags: [privacy, parsing, performance]
+# created: 2025-01-22
+# modified: 2025-01-22
+# version: 1.0.0
+# agent_id: AGENT-PRIME-001
+# execution: Imported by cookie_interceptor.py and traffic_blocker.py
+# ==============================================================================
+
+import functools
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=4096)
+def extract_domain_from_url(url):
+    """Extract domain from URL, without user info or port"""
+    try:
+        # Plain string splits; urlparse() builds a whole ParseResult
+        # when only the host is wanted
+        rest = url.partition("://")[2] or url
+        host = rest.split("/", 1)[0].split("?", 1)[0].split("#", 1)[0]
+        host = host.rpartition("@")[2]
+        if host.startswith("["):
+            return host.partition("]")[0] + "]"
+        return host.partition(":")[0]
+    except Exception as e:
+        logger.error(f"Error extracting domain from {url}: {e}")
+        return url
@@ -13,18 +13,50 @@
 # ==============================================================================
 
 import argparse
-import yaml
+import os
 import sys
-from pathlib import Path
-from datetime import datetime
-from database_handler import DatabaseHandler
+
+# Listing queries are module constants so repeated calls reuse sqlite3's
+# cached prepared statements instead of re-parsing the SQL text
+_SQL_TOP_BLOCKED_DOMAINS = (
+    "SELECT domain, category, hit_count FROM tracking_domains"
+    " WHERE blocked = 1 ORDER BY hit_count DESC LIMIT ?"
+)
+_SQL_TOP_BLOCKED_IPS = (
+    "SELECT ip_address, associated_domain, hit_count FROM tracking_ips"
+    " WHERE blocked = 1 ORDER BY hit_count DESC LIMIT ?"
+)
+_SQL_RECENT_COOKIES = (
+    "SELECT timestamp, domain, cookie_name, blocked FROM cookie_traffic"
+    " ORDER BY timestamp DESC LIMIT ?"
+)
+_SQL_RECENT_REQUESTS = (
+    "SELECT timestamp, method, host, blocked, block_reason FROM request_log"
+    " ORDER BY timestamp DESC LIMIT ?"
+)
+
+
+# Parsed configs keyed by (path, mtime, size): loading an unchanged file
+# again costs a stat() instead of a parse. Callers share the returned dict
+# and must not modify it
+_CONFIG_CACHE = {}
 
 
 def load_config(config_path="config/config.yaml"):
     """Load configuration"""
     try:
-        with open(config_path, "r") as f:
-            return yaml.safe_load(f)
+        st = os.stat(config_path)
+        key = (os.path.abspath(config_path), st.st_mtime_ns, st.st_size)
+        config = _CONFIG_CACHE.get(key)
+        if config is None:
+            # Imported here so --help and argument errors never load PyYAML
+            import yaml
+
+            with open(config_path, "r") as f:
+                # LibYAML's C loader when PyYAML was built with it
+                config = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+            _CONFIG_CACHE[key] = config
+        return config
     except Exception as e:
         print(f"Error loading config: {e}")
         return {"database": {"path": "database/browser_privacy.db"}}
@@ -45,19 +77,9 @@ def print_stats(db):
     print("=" * 70 + "\n")
 
 
-def list_blocked_domains(db, limit=50):
+def list_blocked_domains(conn, limit=50):
     """List blocked domains"""
-    conn = db._get_connection()
-    cursor = conn.execute(
-        """
-        SELECT domain, category, hit_count, first_seen, last_seen
-        FROM tracking_domains
-        WHERE blocked = 1
-        ORDER BY hit_count DESC
-        LIMIT ?
-        """,
-        (limit,),
-    )
+    cursor = conn.execute(_SQL_TOP_BLOCKED_DOMAINS, (limit,))
 
     print("\n" + "=" * 70)
     print(f"  TOP {limit} BLOCKED DOMAINS")
@@ -65,28 +87,19 @@ def list_blocked_domains(db, limit=50):
     print(f"{'Domain':<40} {'Hits':<10} {'Category':<15}")
     print("-" * 70)
 
-    for row in cursor.fetchall():
-        domain = row[0][:38]
-        category = row[1][:13]
-        hit_count = row[2]
-        print(f"{domain:<40} {hit_count:<10} {category:<15}")
+    # Format all rows into one buffer and write it once
+    out = []
+    append = out.append
+    for row in cursor:
+        append("%-40s %-10d %-15s\n" % (row[0][:38], row[2], row[1][:13]))
+    sys.stdout.write("".join(out))
 
     print("=" * 70 + "\n")
 
 
-def list_blocked_ips(db, limit=50):
+def list_blocked_ips(conn, limit=50):
     """List blocked IPs"""
-    conn = db._get_connection()
-    cursor = conn.execute(
-        """
-        SELECT ip_address, associated_domain, hit_count, first_seen, last_seen
-        FROM tracking_ips
-        WHERE blocked = 1
-        ORDER BY hit_count DESC
-        LIMIT ?
-        """,
-        (limit,),
-    )
+    cursor = conn.execute(_SQL_TOP_BLOCKED_IPS, (limit,))
 
     print("\n" + "=" * 70)
     print(f"  TOP {limit} BLOCKED IPs")
@@ -94,27 +107,18 @@ def list_blocked_ips(db, limit=50):
     print(f"{'IP Address':<20} {'Hits':<10} {'Associated Domain':<35}")
     print("-" * 70)
 
-    for row in cursor.fetchall():
-        ip = row[0]
-        domain = (row[1] or "")[:33]
-        hit_count = row[2]
-        print(f"{ip:<20} {hit_count:<10} {domain:<35}")
+    out = []
+    append = out.append
+    for row in cursor:
+        append("%-20s %-10d %-35s\n" % (row[0], row[2], (row[1] or "")[:33]))
+    sys.stdout.write("".join(out))
 
     print("=" * 70 + "\n")
 
 
-def list_cookies(db, limit=50):
+def list_cookies(conn, limit=50):
     """List recent cookie attempts"""
-    conn = db._get_connection()
-    cursor = conn.execute(
-        """
-        SELECT timestamp, domain, cookie_name, blocked
-        FROM cookie_traffic
-        ORDER BY timestamp DESC
-        LIMIT ?
-        """,
-        (limit,),
-    )
+    cursor = conn.execute(_SQL_RECENT_COOKIES, (limit,))
 
     print("\n" + "=" * 70)
     print(f"  RECENT {limit} COOKIE ATTEMPTS")
@@ -122,32 +126,33 @@ def list_cookies(db, limit=50):
     print(f"{'Time':<20} {'Domain':<30} {'Cookie':<20}")
     print("-" * 70)
 
-    for row in cursor.fetchall():
-        timestamp = row[0][:19]
-        domain = row[1][:28]
-        cookie_name = row[2][:18]
-        blocked = "BLOCKED" if row[3] else "ALLOWED"
-        print(f"{timestamp:<20} {domain:<30} {cookie_name:<20}")
+    out = []
+    append = out.append
+    for row in cursor:
+        append("%-20s %-30s %-20s\n" % (row[0][:19], row[1][:28], row[2][:18]))
+    sys.stdout.write("".join(out))
 
     print("=" * 70 + "\n")
 
 
-def export_blocklist(db, output_file, format="hosts"):
+def export_blocklist(db, output_file, format="hosts", config=None):
     """Export blocklist to file"""
     from traffic_blocker import TrafficBlocker
 
-    config = load_config()
+    if config is None:
+        config = load_config()
     blocker = TrafficBlocker(db, config)
 
-    blocklist = blocker.export_blocklist(format=format)
+    # Stream lines straight to disk instead of building the whole file in memory
+    try:
+        with open(output_file, "w", buffering=1 << 20) as f:
+            f.writelines(blocker.iter_blocklist(format=format))
+    except Exception as e:
+        print(f"\nError exporting blocklist: {e}\n")
+        return
 
-    if blocklist:
-        with open(output_file, "w") as f:
-            f.write(blocklist)
-        print(f"\nBlocklist exported to: {output_file}")
-        print(f"Format: {format}\n")
-    else:
-        print("\nError exporting blocklist\n")
+    print(f"\nBlocklist exported to: {output_file}")
+    print(f"Format: {format}\n")
 
 
 def add_to_whitelist(db, domain, reason=""):
@@ -162,18 +167,9 @@ def add_to_blocklist(db, domain, category="manual"):
     print(f"\nAdded {domain} to blocklist (category: {category})\n")
 
 
-def view_recent_requests(db, limit=50):
+def view_recent_requests(conn, limit=50):
     """View recent requests"""
-    conn = db._get_connection()
-    cursor = conn.execute(
-        """
-        SELECT timestamp, method, host, blocked, block_reason
-        FROM request_log
-        ORDER BY timestamp DESC
-        LIMIT ?
-        """,
-        (limit,),
-    )
+    cursor = conn.execute(_SQL_RECENT_REQUESTS, (limit,))
 
     print("\n" + "=" * 70)
     print(f"  RECENT {limit} REQUESTS")
@@ -181,12 +177,12 @@ def view_recent_requests(db, limit=50):
     print(f"{'Time':<20} {'Method':<8} {'Host':<30} {'Status':<12}")
     print("-" * 70)
 
-    for row in cursor.fetchall():
-        timestamp = row[0][:19]
-        method = row[1]
-        host = row[2][:28]
-        blocked = "BLOCKED" if row[3] else "ALLOWED"
-        print(f"{timestamp:<20} {method:<8} {host:<30} {blocked:<12}")
+    out = []
+    append = out.append
+    for row in cursor:
+        status = "BLOCKED" if row[3] else "ALLOWED"
+        append("%-20s %-8s %-30s %-12s\n" % (row[0][:19], row[1], row[2][:28], status))
+    sys.stdout.write("".join(out))
 
     print("=" * 70 + "\n")
 
@@ -269,30 +265,36 @@ Examples:
         parser.print_help()
         sys.exit(1)
 
+    # Heavy imports are deferred until a command is actually going to run
+    from database_handler import DatabaseHandler
+
     # Load config and initialize database
     config = load_config(args.config)
     db_path = config.get("database", {}).get("path", "database/browser_privacy.db")
     db = DatabaseHandler(db_path)
 
+    # One connection for the whole CLI session, shared by the listing commands
+    conn = db._get_connection()
+
     # Execute command
     try:
         if args.command == "stats":
             print_stats(db)
 
         elif args.command == "domains":
-            list_blocked_domains(db, args.limit)
+            list_blocked_domains(conn, args.limit)
 
         elif args.command == "ips":
-            list_blocked_ips(db, args.limit)
+            list_blocked_ips(conn, args.limit)
 
         elif args.command == "cookies":
-            list_cookies(db, args.limit)
+            list_cookies(conn, args.limit)
 
         elif args.command == "requests":
-            view_recent_requests(db, args.limit)
+            view_recent_requests(conn, args.limit)
 
         elif args.command == "export":
-            export_blocklist(db, args.output_file, args.format)
+            export_blocklist(db, args.output_file, args.format, config)
 
         elif args.command == "whitelist":
             add_to_whitelist(db, args.domain, args.reason)
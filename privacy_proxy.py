@@ -13,12 +13,13 @@
 # ==============================================================================
 
 import logging
+import queue
 import sys
 import yaml
 import argparse
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from mitmproxy import http
-from mitmproxy.tools.main import mitmdump
 
 from database_handler import DatabaseHandler
 from fingerprint_randomizer import FingerprintRandomizer
@@ -33,12 +34,22 @@ cookie_interceptor = None
 traffic_blocker = None
 config = None
 
+# Config flags read on every request, resolved once in main()
+log_requests = True
+
+# Writes log records to file/console off the request path, started in setup_logging()
+log_listener = None
+
+
+# LibYAML's C loader when PyYAML was built with it, pure-Python otherwise
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 def load_config(config_path):
     """Load configuration from YAML file"""
     try:
         with open(config_path, "r") as f:
-            return yaml.safe_load(f)
+            return yaml.load(f, Loader=YAML_LOADER)
     except Exception as e:
         print(f"Error loading config: {e}")
         return {}
@@ -58,10 +69,22 @@ def setup_logging(config):
     if console:
         handlers.append(logging.StreamHandler())
 
+    formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    # Request hooks only enqueue records; the listener thread does the I/O.
+    # The queue handler keeps just the message, the real handlers format it.
+    global log_listener
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    log_listener = QueueListener(log_queue, *handlers)
+    log_listener.start()
+
     logging.basicConfig(
         level=getattr(logging, log_level),
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=handlers,
+        handlers=[queue_handler],
     )
 
     return logging.getLogger(__name__)
@@ -73,49 +96,53 @@ class PrivacyProxyAddon:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.request_count = 0
+        # The first fingerprinted request rotates as "launch", the rest as "request"
+        self.trigger = "launch"
 
     def request(self, flow: http.HTTPFlow) -> None:
         """Process outgoing requests"""
         try:
             self.request_count += 1
 
+            # mitmproxy has already parsed the host (the Host header in
+            # transparent mode); every stage below reuses it
+            url = flow.request.pretty_url
+            domain = flow.request.pretty_host
+            flow.fingerprint_id = None
+
             # Check if request should be blocked
-            if traffic_blocker and traffic_blocker.process_request(flow):
+            if traffic_blocker and traffic_blocker.process_request(flow, domain=domain):
                 # Request was blocked, don't process further
                 return
 
             # Rotate fingerprint if needed
             if fingerprint_randomizer:
-                trigger = "request"
-                if self.request_count == 1:
-                    trigger = "launch"
+                trigger = self.trigger
+                self.trigger = "request"
 
                 if fingerprint_randomizer.should_rotate(trigger):
-                    fingerprint = fingerprint_randomizer.generate_fingerprint(trigger)
-                    flow.fingerprint_id = getattr(fingerprint_randomizer.db, "last_fingerprint_id", None)
+                    fingerprint_randomizer.generate_fingerprint(trigger)
+                    flow.fingerprint_id = fingerprint_randomizer.db.last_fingerprint_id
                 else:
-                    fingerprint = fingerprint_randomizer.get_current_fingerprint()
+                    fingerprint_randomizer.get_current_fingerprint()
 
                 # Apply fingerprint to headers
                 fingerprint_randomizer.apply_to_headers(flow.request.headers)
 
             # Process cookies in request
             if cookie_interceptor:
-                cookie_interceptor.process_request_cookies(flow)
+                cookie_interceptor.process_request_cookies(flow, domain=domain)
 
             # Log request
-            if db_handler and config.get("database", {}).get("log_requests", True):
-                url = flow.request.pretty_url
-                domain = cookie_interceptor.extract_domain_from_url(url) if cookie_interceptor else ""
+            if db_handler and log_requests:
                 ip_address = flow.server_conn.address[0] if flow.server_conn else None
-                fingerprint_id = getattr(flow, "fingerprint_id", None)
 
                 db_handler.log_request(
                     flow.request.method,
                     url,
                     domain,
                     ip_address,
-                    fingerprint_id,
+                    flow.fingerprint_id,
                     blocked=False,
                 )
 
@@ -163,6 +190,8 @@ class PrivacyProxyAddon:
 
         # Print statistics
         if db_handler:
+            # Commit request/cookie logs still queued for the writer thread
+            db_handler.flush()
             stats = db_handler.get_statistics()
             self.logger.info(f"Total Requests: {stats.get('total_requests', 0)}")
             self.logger.info(f"Blocked Domains: {stats.get('blocked_domains', 0)}")
@@ -195,10 +224,14 @@ class PrivacyProxyAddon:
         if db_handler:
             db_handler.close()
 
+        # Write out any log records still queued
+        if log_listener:
+            log_listener.stop()
+
 
 def main():
     """Main entry point"""
-    global db_handler, fingerprint_randomizer, cookie_interceptor, traffic_blocker, config
+    global db_handler, fingerprint_randomizer, cookie_interceptor, traffic_blocker, config, log_requests
 
     # Parse arguments
     parser = argparse.ArgumentParser(description="Privacy Proxy Server")
@@ -221,8 +254,13 @@ def main():
     logger = setup_logging(config)
 
     # Initialize database
-    db_path = config.get("database", {}).get("path", "database/browser_privacy.db")
-    db_handler = DatabaseHandler(db_path)
+    db_config = config.get("database", {})
+    log_requests = bool(db_config.get("log_requests", True))
+    db_handler = DatabaseHandler(
+        db_config.get("path", "database/browser_privacy.db"),
+        write_batch_size=db_config.get("write_batch_size", 500),
+        flush_interval=db_config.get("flush_interval", 0.05),
+    )
 
     # Initialize components
     fingerprint_randomizer = FingerprintRandomizer(db_handler, config)
@@ -230,8 +268,9 @@ def main():
     traffic_blocker = TrafficBlocker(db_handler, config)
 
     # Add default whitelisted domains
-    for domain in config.get("whitelist", []):
-        db_handler.add_to_whitelist(domain, "config")
+    whitelist = config.get("whitelist", [])
+    if whitelist and db_handler.add_to_whitelist_many((domain, "config") for domain in whitelist):
+        logger.info(f"Added {len(whitelist)} config domains to whitelist")
 
     logger.info("All components initialized successfully")
 
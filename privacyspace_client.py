@@ -14,14 +14,57 @@
 
 import requests
 import socketio
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to the stdlib json module
+    orjson = None
 import logging
 import hashlib
+import json
+import os
+import platform
+import queue
+import random
 import threading
 from datetime import datetime
-import time
+from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# The anonymous user ID is derived once per machine and kept here
+USER_ID_CACHE = Path.home() / '.cache' / 'privacyspace' / 'user_id'
+
+# Connection retries back off exponentially (plus jitter, so restarted
+# servers are not hit by every client at once) and never give up; after a
+# few failures the client runs standalone until a retry succeeds
+CONNECT_BACKOFF_BASE = 0.5
+CONNECT_BACKOFF_MAX = 30
+STANDALONE_AFTER_ATTEMPTS = 5
+
+# Tracker reports are sent by a background thread; this bounds the backlog
+REPORT_QUEUE_SIZE = 10000
+
+_STOP = object()
+
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+_NDJSON_HEADERS = {'Accept': 'application/x-ndjson'}
+
+# Marks the end of a blocked domain in the reverse-label trie
+_TRIE_END = '$'
+
+# Cookie reports all share one shape; only the domain and cookie name vary
+_COOKIE_REPORT_TEMPLATE = (
+    '{"user_id":"%s","domain":"%%s","method":"cookie",'
+    '"confidence":%%r,"context":{"cookie_name":"%%s"}}'
+)
+
+# str.translate table that escapes text for use inside a JSON string
+_JSON_ESCAPES = {i: f"\\u{i:04x}" for i in range(0x20)}
+_JSON_ESCAPES.update({ord('"'): '\\"', ord("\\"): "\\\\"})
+
 
 class PrivacySpaceClient:
     """Client for syncing with PrivacySpace central server"""
@@ -33,19 +76,58 @@ class PrivacySpaceClient:
         self.user_id = self._generate_user_id()
         self.sio = None
         self.shared_blocklist = set()
+        # The same domains keyed by reversed labels: com -> doubleclick -> '$'
+        self._blocklist_trie = {}
         self.update_callbacks = []
 
+        # One pooled HTTP session keeps connections to the server alive
+        self._http = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(total=3, backoff_factor=0.3),
+        )
+        self._http.mount('http://', adapter)
+        self._http.mount('https://', adapter)
+
+        # Reports are queued by the proxy and posted by a sender thread
+        self._report_q = queue.Queue(maxsize=REPORT_QUEUE_SIZE)
+        self._sender = None
+        self._sender_lock = threading.Lock()
+        self._closing = threading.Event()
+        self.dropped_reports = 0
+        # The cached user_id is whatever the file holds: escape it for JSON
+        # and keep any '%' out of the second round of formatting
+        self._cookie_report = _COOKIE_REPORT_TEMPLATE % (
+            self.user_id.translate(_JSON_ESCAPES).replace('%', '%%')
+        )
+
         if self.enabled:
             self._init_socketio()
 
     def _generate_user_id(self):
-        """Generate anonymous user ID"""
-        import uuid
-        import platform
+        """Generate anonymous user ID, cached on disk after the first run"""
+        try:
+            user_id = USER_ID_CACHE.read_text().strip()
+            if user_id:
+                return user_id
+        except OSError:
+            pass
 
         # Generate based on machine ID (anonymous but consistent)
         machine_id = f"{platform.node()}{platform.machine()}".encode()
-        return hashlib.sha256(machine_id).hexdigest()[:16]
+        user_id = hashlib.sha256(machine_id).hexdigest()[:16]
+
+        # Write to a temp file and rename, so readers never see a partial ID
+        try:
+            USER_ID_CACHE.parent.mkdir(parents=True, exist_ok=True)
+            tmp = USER_ID_CACHE.with_name(f"{USER_ID_CACHE.name}.{os.getpid()}.tmp")
+            tmp.write_text(user_id)
+            os.replace(tmp, USER_ID_CACHE)
+        except OSError as e:
+            logger.debug(f"Could not cache user ID: {e}")
+
+        return user_id
 
     def _init_socketio(self):
         """Initialize SocketIO connection"""
@@ -56,6 +138,7 @@ class PrivacySpaceClient:
             def connect():
                 logger.info("✅ Connected to PrivacySpace central server")
                 self.connected = True
+                self.enabled = True
                 self.sio.emit('subscribe', {'user_id': self.user_id})
                 self._fetch_blocklist()
 
@@ -68,11 +151,17 @@ class PrivacySpaceClient:
             def new_tracker(data):
                 logger.info(f"📡 New tracker from network: {data['domain']} (company: {data['company']})")
                 self.shared_blocklist.add(data['domain'])
+                self._add_to_trie(self._blocklist_trie, data['domain'])
 
                 # Notify callbacks
                 for callback in self.update_callbacks:
                     callback(data)
 
+            @self.sio.event
+            def new_trackers_batch(batch):
+                for data in batch:
+                    new_tracker(data)
+
             @self.sio.event
             def subscribed(data):
                 logger.info(f"✅ Subscribed to PrivacySpace updates (User: {data['user_id'][:8]}...)")
@@ -86,51 +175,125 @@ class PrivacySpaceClient:
 
     def _connect(self):
         """Connect to server (blocking, run in thread)"""
-        max_retries = 5
         retry_count = 0
 
-        while retry_count < max_retries and not self.connected:
+        while not self.connected and not self._closing.is_set():
+            # Once in standalone mode, keep retrying quietly
+            level = logging.INFO if retry_count < STANDALONE_AFTER_ATTEMPTS else logging.DEBUG
             try:
-                logger.info(f"Connecting to PrivacySpace server: {self.server_url}")
+                logger.log(level, f"Connecting to PrivacySpace server: {self.server_url}")
                 self.sio.connect(self.server_url, wait_timeout=10)
                 break
             except Exception as e:
                 retry_count += 1
-                logger.warning(f"Connection attempt {retry_count}/{max_retries} failed: {e}")
-                if retry_count < max_retries:
-                    time.sleep(5)
+                if retry_count <= STANDALONE_AFTER_ATTEMPTS:
+                    logger.warning(f"Connection attempt {retry_count} failed: {e}")
                 else:
+                    logger.debug(f"Connection attempt {retry_count} failed: {e}")
+                if retry_count == STANDALONE_AFTER_ATTEMPTS:
                     logger.error("Failed to connect to PrivacySpace server. Running in standalone mode.")
                     self.enabled = False
 
+                delay = min(CONNECT_BACKOFF_MAX, CONNECT_BACKOFF_BASE * 2 ** min(retry_count, 16))
+                self._closing.wait(delay + random.random())
+
     def _fetch_blocklist(self):
-        """Fetch current blocklist from server"""
+        """Fetch current blocklist from server, streamed one tracker per line"""
         try:
-            response = requests.get(f"{self.server_url}/api/blocklist", timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                self.shared_blocklist = {item['domain'] for item in data['blocklist']}
-                logger.info(f"📥 Fetched shared blocklist: {len(self.shared_blocklist)} domains")
+            response = self._http.get(
+                f"{self.server_url}/api/blocklist",
+                headers=_NDJSON_HEADERS,
+                stream=True,
+                timeout=5
+            )
+            with response:
+                if response.status_code != 200:
+                    return
+
+                loads = orjson.loads if orjson else json.loads
+                if response.headers.get('Content-Type', '').startswith('application/x-ndjson'):
+                    domains = (loads(line)['domain'] for line in response.iter_lines() if line)
+                else:
+                    # Servers without streaming send the whole list as one document
+                    domains = (item['domain'] for item in loads(response.content)['blocklist'])
+
+                blocklist = set()
+                trie = {}
+                for domain in domains:
+                    blocklist.add(domain)
+                    self._add_to_trie(trie, domain)
+
+            self.shared_blocklist = blocklist
+            self._blocklist_trie = trie
+            logger.info(f"📥 Fetched shared blocklist: {len(self.shared_blocklist)} domains")
         except Exception as e:
             logger.warning(f"Failed to fetch blocklist: {e}")
 
     def report_tracker(self, domain, method='cookie', confidence=0.8, context=None):
-        """Report tracker discovery to central server"""
+        """Queue a tracker discovery for the central server
+
+        Returns immediately; reports are posted by a background thread so
+        the proxy never waits on the network.
+        """
+        if not self.enabled or not domain:
+            return
+
+        data = {
+            'user_id': self.user_id,
+            'domain': domain,
+            'method': method,
+            'confidence': confidence,
+            'context': context or {}
+        }
+        self._queue_report(domain, orjson.dumps(data) if orjson else json.dumps(data).encode())
+
+    def report_cookie_tracker(self, domain, cookie_name, confidence=0.9):
+        """Queue a tracking-cookie discovery, filling in the fixed report template"""
         if not self.enabled or not domain:
             return
 
+        body = self._cookie_report % (
+            domain.translate(_JSON_ESCAPES),
+            confidence,
+            cookie_name.translate(_JSON_ESCAPES),
+        )
+        self._queue_report(domain, body.encode('utf-8', 'replace'))
+
+    def _queue_report(self, domain, body):
+        """Hand an encoded report to the sender thread, dropping it if the queue is full"""
+        self._ensure_sender()
+        try:
+            self._report_q.put_nowait((domain, body))
+        except queue.Full:
+            self.dropped_reports += 1
+            if self.dropped_reports == 1 or self.dropped_reports % 1000 == 0:
+                logger.warning(f"Report queue full, dropped {self.dropped_reports} reports")
+
+    def _ensure_sender(self):
+        """Start the report sender thread on first use"""
+        if self._sender is None:
+            with self._sender_lock:
+                if self._sender is None:
+                    self._sender = threading.Thread(
+                        target=self._send_reports, name="privacyspace-reports", daemon=True
+                    )
+                    self._sender.start()
+
+    def _send_reports(self):
+        """Sender thread: post queued reports until stopped"""
+        while True:
+            item = self._report_q.get()
+            if item is _STOP:
+                break
+            self._post_report(*item)
+
+    def _post_report(self, domain, body):
+        """Post a single JSON-encoded tracker report"""
         try:
-            data = {
-                'user_id': self.user_id,
-                'domain': domain,
-                'method': method,
-                'confidence': confidence,
-                'context': context or {}
-            }
-
-            response = requests.post(
+            response = self._http.post(
                 f"{self.server_url}/api/report",
-                json=data,
+                data=body,
+                headers=_JSON_HEADERS,
                 timeout=5
             )
 
@@ -138,25 +301,33 @@ class PrivacySpaceClient:
                 result = response.json()
                 if result.get('is_new'):
                     logger.info(f"🎉 NEW TRACKER DISCOVERY: {domain}")
-                return result
             else:
                 logger.warning(f"Failed to report tracker: {response.status_code}")
 
         except Exception as e:
             logger.error(f"Error reporting tracker: {e}")
 
+    @staticmethod
+    def _add_to_trie(trie, domain):
+        """Insert a domain into a reverse-label trie"""
+        node = trie
+        for label in reversed(domain.lower().split('.')):
+            node = node.setdefault(label, {})
+        node[_TRIE_END] = True
+
     def is_blocked(self, domain):
-        """Check if domain is in shared blocklist"""
+        """Check if domain or one of its parent domains is in shared blocklist"""
         if not self.enabled:
             return False
 
-        # Check exact match and parent domains
-        parts = domain.split('.')
-        for i in range(len(parts)):
-            check_domain = '.'.join(parts[i:])
-            if check_domain in self.shared_blocklist:
+        # Walk from the TLD down; any blocked suffix on the way blocks the domain
+        node = self._blocklist_trie
+        for label in reversed(domain.lower().split('.')):
+            node = node.get(label)
+            if node is None:
+                return False
+            if _TRIE_END in node:
                 return True
-
         return False
 
     def add_update_callback(self, callback):
@@ -166,15 +337,25 @@ class PrivacySpaceClient:
     def get_stats(self):
         """Get stats from central server"""
         try:
-            response = requests.get(f"{self.server_url}/api/stats", timeout=5)
+            response = self._http.get(f"{self.server_url}/api/stats", timeout=5)
             if response.status_code == 200:
                 return response.json()
         except Exception as e:
             logger.error(f"Error fetching stats: {e}")
         return None
 
-    def disconnect(self):
-        """Disconnect from server"""
+    def disconnect(self, timeout=5):
+        """Send pending reports, then disconnect from server"""
+        self._closing.set()
+        if self._sender is not None:
+            try:
+                self._report_q.put(_STOP, timeout=timeout)
+            except queue.Full:
+                pass  # Still draining; the daemon thread ends with the process
+            self._sender.join(timeout)
+            self._sender = None
+        self._http.close()
+
         if self.sio and self.connected:
             self.sio.disconnect()
             logger.info("Disconnected from PrivacySpace")
@@ -13,16 +13,43 @@
 # ==============================================================================
 
 import os
+
+# Websockets are served from an eventlet loop when it is installed, so
+# fan-out does not cost an OS thread per client. Set
+# PRIVACYSPACE_ASYNC_MODE=threading to opt out. Patching must happen
+# before anything below imports socket or threading.
+ASYNC_MODE = os.environ.get('PRIVACYSPACE_ASYNC_MODE', 'eventlet')
+eventlet = None
+if ASYNC_MODE == 'eventlet':
+    try:
+        import eventlet
+        import eventlet.tpool
+        eventlet.monkey_patch()
+    except ImportError:  # optional, falls back to threading
+        ASYNC_MODE = 'threading'
+
+import re
 import json
 import sqlite3
 import hashlib
-from datetime import datetime, timedelta
-from flask import Flask, render_template, jsonify, request
-from flask_socketio import SocketIO, emit
+import shutil
+import atexit
+from datetime import datetime
+from flask import Flask, Response, render_template, jsonify, request, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+from flask_socketio import SocketIO, emit, join_room
 from flask_cors import CORS
 import logging
-from threading import Lock
-from collections import defaultdict
+import queue
+import time
+from threading import Lock, Thread
+from collections import Counter, OrderedDict, defaultdict
+from heapq import nlargest
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to the stdlib json module
+    orjson = None
 
 # Setup logging
 logging.basicConfig(
@@ -31,31 +58,185 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+if orjson is not None:
+    class OrjsonProvider(DefaultJSONProvider):
+        """Flask JSON provider backed by orjson"""
+
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+def dumps_json(obj):
+    """Serialize obj to JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj).encode()
+
 app = Flask(__name__)
+if orjson is not None:
+    app.json = OrjsonProvider(app)
 app.config['SECRET_KEY'] = 'privacyspace-secret-key-2025'
 CORS(app)
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE)
 
 # Thread-safe locks
-db_lock = Lock()
 stats_lock = Lock()
 
-# In-memory stats cache
+# In-memory stats, loaded by init_database() and updated as reports are
+# written, so /api/stats never has to scan the database
+ACTIVE_USER_WINDOW = 300
+RECENT_TRACKER_WINDOW = 3600
+RECENT_TRACKERS_MAX = 50
 stats_cache = {
-    'active_users': set(),
+    'active_users': {},                 # user_id -> last activity (epoch seconds)
     'total_blocks': 0,
-    'recent_trackers': [],
+    'recent_trackers': OrderedDict(),   # domain -> (tracker, last seen), newest last
     'top_companies': defaultdict(int)
 }
 
-# Database setup
-DB_PATH = 'database/privacyspace.db'
+# Database setup. Reports are lossy intelligence, so PRIVACYSPACE_DB may point
+# at tmpfs (e.g. /dev/shm/privacyspace.db) to avoid disk syncs. With
+# PRIVACYSPACE_DB_SNAPSHOT set, the database is restored from that file at
+# startup and copied back every SNAPSHOT_INTERVAL seconds and at exit, so a
+# crash loses at most one interval of reports
+DB_PATH = os.environ.get('PRIVACYSPACE_DB', 'database/privacyspace.db')
+DB_SNAPSHOT_PATH = os.environ.get('PRIVACYSPACE_DB_SNAPSHOT')
+SNAPSHOT_INTERVAL = int(os.environ.get('PRIVACYSPACE_SNAPSHOT_INTERVAL', 60))
+
+# Reports are queued by /api/report and written in batches by a writer thread
+REPORT_BATCH_SIZE = 500
+REPORT_FLUSH_INTERVAL = 0.1
+report_queue = queue.Queue()
+
+# Domains already in global_trackers, so /api/report can answer is_new
+# without touching the database
+known_trackers = set()
+known_trackers_lock = Lock()
+
+# Tracker events are collected here and broadcast as one batch per interval,
+# so a burst of reports costs one serialization per client per interval.
+# Proxy clients in the 'trackers' room get every event; dashboards in the
+# 'dashboard' room get a block count plus the newest events for their feed
+BROADCAST_INTERVAL = 0.1
+DASHBOARD_FEED_SIZE = 50
+pending_broadcasts = []
+broadcast_lock = Lock()
+
+# Writes go through one long-lived connection, so its page cache and
+# statement cache stay warm instead of being rebuilt on every connect.
+# db_lock serializes its use: hold it from get_db() until done with the
+# connection (run_db does this)
+db_lock = Lock()
+_db = None
+
+# Reads never take db_lock: they borrow a connection from a small fixed pool
+# (run_read), and WAL lets them run alongside the writer
+DB_READ_POOL_SIZE = 4
+read_pool = queue.Queue()
+
+# Hot-path SQL, defined once so the shared connection reuses its
+# prepared statements from sqlite3's statement cache
+SQL_UPSERT_TRACKER = '''
+    INSERT INTO global_trackers (domain, company, method, confidence, category, total_blocks)
+    VALUES (?, ?, ?, ?, 'tracker', ?)
+    ON CONFLICT(domain) DO UPDATE SET
+        total_blocks = total_blocks + excluded.total_blocks,
+        last_seen = CURRENT_TIMESTAMP,
+        company = COALESCE(company, excluded.company),
+        method = COALESCE(method, excluded.method)
+'''
+SQL_INSERT_REPORT = '''
+    INSERT INTO tracker_reports (user_id, domain, method, confidence, context)
+    VALUES (?, ?, ?, ?, ?)
+'''
+SQL_UPSERT_USER = '''
+    INSERT INTO active_users (user_id, last_seen, total_reports, privacy_score)
+    VALUES (?, CURRENT_TIMESTAMP, ?, ?)
+    ON CONFLICT(user_id) DO UPDATE SET
+        last_seen = CURRENT_TIMESTAMP,
+        total_reports = total_reports + excluded.total_reports,
+        privacy_score = privacy_score + excluded.privacy_score
+'''
+SQL_TOUCH_USER = '''
+    INSERT INTO active_users (user_id, last_seen)
+    VALUES (?, CURRENT_TIMESTAMP)
+    ON CONFLICT(user_id) DO UPDATE SET last_seen = CURRENT_TIMESTAMP
+'''
+SQL_UPSERT_COMPANY = '''
+    INSERT INTO companies (name, total_trackers, total_blocks, last_activity)
+    VALUES (?, 1, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(name) DO UPDATE SET
+        total_blocks = total_blocks + excluded.total_blocks,
+        last_activity = CURRENT_TIMESTAMP
+'''
+SQL_STATS_TOP_COMPANIES = '''
+    SELECT company, SUM(total_blocks)
+    FROM global_trackers
+    WHERE company IS NOT NULL
+    GROUP BY company
+'''
+# Tracker columns for the recent list, plus last_seen as epoch seconds
+RECENT_TRACKER_COLUMNS = (
+    "domain, total_blocks, company, last_seen, CAST(strftime('%s', last_seen) AS INTEGER)"
+)
+SQL_RECENT_TRACKERS = f'''
+    SELECT {RECENT_TRACKER_COLUMNS}
+    FROM global_trackers
+    ORDER BY last_seen DESC
+    LIMIT ?
+'''
+# The domain list is bound as one JSON array so the SQL text never changes
+SQL_TRACKERS_BY_DOMAIN = f'''
+    SELECT {RECENT_TRACKER_COLUMNS}
+    FROM global_trackers
+    WHERE domain IN (SELECT value FROM json_each(?))
+    ORDER BY last_seen
+'''
+SQL_LIVE_TRACKERS = '''
+    SELECT domain, total_blocks, company, method, last_seen
+    FROM global_trackers
+    WHERE last_seen > datetime('now', ?)
+    ORDER BY last_seen DESC
+    LIMIT 20
+'''
+SQL_BLOCKLIST = '''
+    SELECT domain, company, total_blocks, confidence
+    FROM global_trackers
+    WHERE auto_block = 1
+    ORDER BY total_blocks DESC
+'''
+
+def configure_connection(conn):
+    """Apply the server's SQLite tuning to a new connection"""
+    # WAL turns each commit into an append to the log instead of a journal
+    # rewrite + fsync, and lets the read pool (and other processes) read
+    # while a report is written
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute('PRAGMA mmap_size=268435456')
+    conn.execute('PRAGMA cache_size=-65536')
+    conn.execute('PRAGMA wal_autocheckpoint=1000')
+    conn.execute('PRAGMA busy_timeout=5000')
+    return conn
 
 def init_database():
     """Initialize the central database"""
-    os.makedirs('database', exist_ok=True)
+    os.makedirs(os.path.dirname(DB_PATH) or '.', exist_ok=True)
+    restore_snapshot()
+
+    with db_lock:
+        create_schema(get_db())
+
+    for _ in range(DB_READ_POOL_SIZE):
+        read_pool.put(open_reader())
 
-    conn = sqlite3.connect(DB_PATH)
+    logger.info("Database initialized successfully")
+
+def create_schema(conn):
+    """Create tables and indexes, then load known trackers and stats"""
     cursor = conn.cursor()
 
     # Global tracker registry
@@ -84,7 +265,7 @@ def init_database():
             timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             method TEXT,
             confidence REAL,
-            context TEXT
+            context BLOB
         )
     ''')
 
@@ -109,39 +290,167 @@ def init_database():
         )
     ''')
 
-    # Create indexes
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_domain ON global_trackers(domain)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_last_seen ON global_trackers(last_seen)')
+    # Create indexes. The UNIQUE constraint already indexes domain, and the
+    # covering last_seen index answers the recent/live queries on its own
+    cursor.execute('DROP INDEX IF EXISTS idx_domain')
+    cursor.execute('DROP INDEX IF EXISTS idx_last_seen')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_last_seen_cover
+        ON global_trackers(last_seen DESC, domain, total_blocks, company, method)
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_company_blocks ON global_trackers(company, total_blocks DESC)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_user_reports ON tracker_reports(user_id)')
 
     conn.commit()
-    conn.close()
 
-    logger.info("Database initialized successfully")
+    # Refresh planner statistics so the new indexes get picked
+    cursor.execute('ANALYZE')
+
+    cursor.execute('SELECT domain FROM global_trackers')
+    with known_trackers_lock:
+        known_trackers.update(row[0] for row in cursor)
+
+    load_stats(cursor)
+
+def load_stats(cursor):
+    """Fill stats_cache from the database"""
+    cursor.execute('SELECT COALESCE(SUM(total_blocks), 0) FROM global_trackers')
+    total_blocks = cursor.fetchone()[0]
+
+    cursor.execute(SQL_STATS_TOP_COMPANIES)
+    top_companies = dict(cursor.fetchall())
+
+    cursor.execute(SQL_RECENT_TRACKERS, (RECENT_TRACKERS_MAX,))
+    recent_rows = cursor.fetchall()
+
+    cursor.execute('''
+        SELECT user_id, CAST(strftime('%s', last_seen) AS INTEGER)
+        FROM active_users
+        WHERE last_seen > datetime('now', ?)
+    ''', (f'-{ACTIVE_USER_WINDOW} seconds',))
+    active_users = dict(cursor.fetchall())
+
+    with stats_lock:
+        stats_cache['total_blocks'] = total_blocks
+        stats_cache['top_companies'].update(top_companies)
+        stats_cache['active_users'].update(active_users)
+        update_recent_trackers(reversed(recent_rows))
+
+def update_recent_trackers(rows):
+    """Move trackers to the newest end of the recent list (caller holds stats_lock)"""
+    recent = stats_cache['recent_trackers']
+    for domain, blocks, company, last_seen, seen in rows:
+        recent.pop(domain, None)
+        recent[domain] = ({
+            'domain': domain,
+            'blocks': blocks,
+            'company': company,
+            'time': last_seen
+        }, seen)
+    while len(recent) > RECENT_TRACKERS_MAX:
+        recent.popitem(last=False)
 
 def get_db():
-    """Get database connection"""
-    return sqlite3.connect(DB_PATH)
+    """Get the shared database connection (caller holds db_lock)"""
+    global _db
+    if _db is None:
+        _db = configure_connection(
+            sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=256)
+        )
+    return _db
 
-def identify_company(domain):
-    """Identify company from domain"""
-    companies = {
-        'google': ['google-analytics', 'doubleclick', 'googletagmanager', 'googlesyndication'],
-        'facebook': ['facebook', 'fbcdn', 'fbsbx'],
-        'amazon': ['amazon-adsystem', 'amazonpay'],
-        'microsoft': ['bing', 'msn', 'live.com'],
-        'twitter': ['twitter', 't.co'],
-        'adobe': ['adobe', 'omtrdc'],
-        'oracle': ['bluekai', 'eloqua'],
-        'salesforce': ['salesforce', 'pardot']
-    }
+def call_db(func, *args):
+    """Call func(*args), on a tpool thread under eventlet"""
+    if eventlet is not None:
+        return eventlet.tpool.execute(func, *args)
+    return func(*args)
 
-    domain_lower = domain.lower()
-    for company, patterns in companies.items():
-        if any(pattern in domain_lower for pattern in patterns):
-            return company.title()
+def run_db(func, *args):
+    """Call func(conn, *args) with the shared connection, holding db_lock
 
-    return 'Unknown'
+    Under eventlet the call runs on a native thread from tpool, so blocking
+    SQLite work stays off the event loop; func must then only touch the
+    database, since the locks here are green and belong to this greenthread.
+    """
+    with db_lock:
+        return call_db(func, get_db(), *args)
+
+def open_reader():
+    """Open a read-only connection for the read pool"""
+    conn = configure_connection(
+        sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=256)
+    )
+    conn.execute('PRAGMA query_only=ON')
+    return conn
+
+def run_read(func, *args):
+    """Call func(conn, *args) with a connection borrowed from the read pool
+
+    Like run_db, the call runs on a tpool thread under eventlet, so func must
+    only touch the database.
+    """
+    conn = read_pool.get()
+    try:
+        return call_db(func, conn, *args)
+    finally:
+        read_pool.put(conn)
+
+def execute_fetchmany(cursor, sql):
+    """Run a query and return its first cursor.arraysize rows"""
+    cursor.execute(sql)
+    return cursor.fetchmany()
+
+def fetch_all(conn, sql, params=()):
+    """Run a query and return all of its rows"""
+    return conn.execute(sql, params).fetchall()
+
+# Substrings that identify a tracker's parent company
+COMPANY_PATTERNS = {
+    'google': ['google-analytics', 'doubleclick', 'googletagmanager', 'googlesyndication'],
+    'facebook': ['facebook', 'fbcdn', 'fbsbx'],
+    'amazon': ['amazon-adsystem', 'amazonpay'],
+    'microsoft': ['bing', 'msn', 'live.com'],
+    'twitter': ['twitter', 't.co'],
+    'adobe': ['adobe', 'omtrdc'],
+    'oracle': ['bluekai', 'eloqua'],
+    'salesforce': ['salesforce', 'pardot']
+}
+
+# One alternation over every pattern; the named group that matched is the company
+_COMPANY_RE = re.compile(
+    '|'.join(
+        f"(?P<{company}>{'|'.join(map(re.escape, patterns))})"
+        for company, patterns in COMPANY_PATTERNS.items()
+    ),
+    re.IGNORECASE,
+)
+_COMPANY_NAMES = {company: company.title() for company in COMPANY_PATTERNS}
+
+def identify_company(domain):
+    """Identify company from domain"""
+    match = _COMPANY_RE.search(domain)
+    return _COMPANY_NAMES[match.lastgroup] if match else 'Unknown'
+
+# Serialized /api/stats and /api/blocklist bodies are reused for a few seconds;
+# the blocklist is also rebuilt as soon as a new tracker is written
+STATS_CACHE_TTL = 2.0
+BLOCKLIST_CACHE_TTL = 5.0
+blocklist_version = 0
+response_cache = {}
+
+def cached_json_response(name, ttl, build, version=None):
+    """Serve a cached JSON body with an ETag, rebuilding it when stale"""
+    now = time.monotonic()
+    entry = response_cache.get(name)
+    if entry is None or entry[0] != version or entry[1] <= now:
+        body = dumps_json(build())
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        entry = response_cache[name] = (version, now + ttl, body, etag)
+
+    body, etag = entry[2], entry[3]
+    if request.headers.get('If-None-Match') == etag:
+        return Response(status=304, headers={'ETag': etag})
+    return Response(body, mimetype='application/json', headers={'ETag': etag})
 
 @app.route('/')
 def index():
@@ -151,86 +460,196 @@ def index():
 @app.route('/api/stats')
 def get_stats():
     """Get global statistics"""
-    with db_lock:
-        conn = get_db()
-        cursor = conn.cursor()
-
-        # Total unique trackers
-        cursor.execute('SELECT COUNT(DISTINCT domain) FROM global_trackers')
-        total_trackers = cursor.fetchone()[0]
-
-        # Total blocks
-        cursor.execute('SELECT SUM(total_blocks) FROM global_trackers')
-        total_blocks = cursor.fetchone()[0] or 0
-
-        # Active users (seen in last 5 minutes)
-        five_mins_ago = (datetime.now() - timedelta(minutes=5)).isoformat()
-        cursor.execute('SELECT COUNT(*) FROM active_users WHERE last_seen > ?', (five_mins_ago,))
-        active_users = cursor.fetchone()[0]
-
-        # Top companies
-        cursor.execute('''
-            SELECT company, SUM(total_blocks) as blocks
-            FROM global_trackers
-            WHERE company IS NOT NULL
-            GROUP BY company
-            ORDER BY blocks DESC
-            LIMIT 10
-        ''')
-        top_companies = [{'name': row[0], 'blocks': row[1]} for row in cursor.fetchall()]
-
-        # Recent trackers (last hour)
-        one_hour_ago = (datetime.now() - timedelta(hours=1)).isoformat()
-        cursor.execute('''
-            SELECT domain, total_blocks, company, last_seen
-            FROM global_trackers
-            WHERE last_seen > ?
-            ORDER BY last_seen DESC
-            LIMIT 50
-        ''', (one_hour_ago,))
-        recent_trackers = [{
-            'domain': row[0],
-            'blocks': row[1],
-            'company': row[2],
-            'time': row[3]
-        } for row in cursor.fetchall()]
-
-        conn.close()
-
-        return jsonify({
+    return cached_json_response('stats', STATS_CACHE_TTL, build_stats)
+
+def build_stats():
+    """Snapshot global statistics from the in-memory counters"""
+    now = time.time()
+    with known_trackers_lock:
+        total_trackers = len(known_trackers)
+
+    with stats_lock:
+        # Forget users who have been quiet for longer than the window
+        active = stats_cache['active_users']
+        for user_id in [u for u, seen in active.items() if seen <= now - ACTIVE_USER_WINDOW]:
+            del active[user_id]
+
+        top_companies = [
+            {'name': name, 'blocks': blocks}
+            for name, blocks in nlargest(10, stats_cache['top_companies'].items(), key=lambda item: item[1])
+        ]
+
+        # Recent trackers (last hour), newest first
+        recent_trackers = [
+            tracker for tracker, seen in reversed(stats_cache['recent_trackers'].values())
+            if seen > now - RECENT_TRACKER_WINDOW
+        ]
+
+        return {
             'total_trackers': total_trackers,
-            'total_blocks': total_blocks,
-            'active_users': active_users,
+            'total_blocks': stats_cache['total_blocks'],
+            'active_users': len(active),
             'top_companies': top_companies,
             'recent_trackers': recent_trackers
-        })
+        }
 
 @app.route('/api/trackers/live')
 def get_live_trackers():
     """Get trackers from last 60 seconds"""
+    rows = run_read(fetch_all, SQL_LIVE_TRACKERS, ('-60 seconds',))
+
+    trackers = [{
+        'domain': row[0],
+        'blocks': row[1],
+        'company': row[2],
+        'method': row[3],
+        'time': row[4]
+    } for row in rows]
+
+    return jsonify(trackers)
+
+def write_reports(reports):
+    """Write a batch of queued reports in one transaction"""
+    global blocklist_version
+    tracker_blocks = Counter()
+    tracker_rows = {}
+    user_reports = Counter()
+    company_blocks = Counter()
+    company_stats = Counter()
+    report_rows = []
+    new_trackers = False
+
+    for user_id, domain, method, confidence, context, company, is_new in reports:
+        new_trackers = new_trackers or is_new
+        tracker_blocks[domain] += 1
+        tracker_rows.setdefault(domain, (domain, company, method, confidence))
+        user_reports[user_id] += 1
+        company_stats[company] += 1
+        if company != 'Unknown':
+            company_blocks[company] += 1
+        # Compact JSON bytes, or NULL for the usual empty context
+        report_rows.append((user_id, domain, method, confidence, dumps_json(context) if context else None))
+
+    tracker_rows = [tracker_rows[domain] + (count,) for domain, count in tracker_blocks.items()]
+    user_rows = [(user_id, count, count * 10) for user_id, count in user_reports.items()]
+    # Only the database calls leave this (green)thread; the locks below are
+    # green under eventlet and must be taken here
+    recent_rows = run_db(write_report_rows, tracker_rows, report_rows, user_rows, company_blocks.items())
+
+    # Bring the in-memory stats up to date with what was just written
+    now = time.time()
+    with stats_lock:
+        stats_cache['total_blocks'] += len(reports)
+        for company, count in company_stats.items():
+            stats_cache['top_companies'][company] += count
+        for user_id in user_reports:
+            stats_cache['active_users'][user_id] = now
+        update_recent_trackers(recent_rows)
+
+    # New domains change the blocklist, so drop its cached response
+    if new_trackers:
+        blocklist_version += 1
+
+def write_report_rows(conn, tracker_rows, report_rows, user_rows, company_rows):
+    """Commit one batch of report rows; returns the touched trackers' recent rows"""
+    with conn:
+        # One upsert per domain; new rows start with this batch's count
+        conn.executemany(SQL_UPSERT_TRACKER, tracker_rows)
+
+        # Log the reports
+        conn.executemany(SQL_INSERT_REPORT, report_rows)
+
+        # Update user records
+        conn.executemany(SQL_UPSERT_USER, user_rows)
+
+        # Update company stats
+        conn.executemany(SQL_UPSERT_COMPANY, company_rows)
+
+    domains = json.dumps([row[0] for row in tracker_rows])
+    return conn.execute(SQL_TRACKERS_BY_DOMAIN, (domains,)).fetchall()
+
+def report_writer():
+    """Writer thread: drain the report queue in batches"""
+    while True:
+        reports = [report_queue.get()]
+
+        # Collect more reports until the batch is full or the interval passes
+        deadline = time.monotonic() + REPORT_FLUSH_INTERVAL
+        while len(reports) < REPORT_BATCH_SIZE:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                reports.append(report_queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+
+        try:
+            write_reports(reports)
+        except Exception as e:
+            logger.error(f"Error writing {len(reports)} reports: {e}")
+
+def start_report_writer():
+    """Start the background report writer"""
+    Thread(target=report_writer, name='report-writer', daemon=True).start()
+
+def broadcast_trackers():
+    """Background task: emit pending tracker events as one batch"""
+    global pending_broadcasts
+    while True:
+        socketio.sleep(BROADCAST_INTERVAL)
+        with broadcast_lock:
+            batch, pending_broadcasts = pending_broadcasts, []
+        if batch:
+            try:
+                socketio.emit('new_trackers_batch', batch, room='trackers')
+                socketio.emit('dashboard_update', {
+                    'blocks': len(batch),
+                    'trackers': batch[-DASHBOARD_FEED_SIZE:]
+                }, room='dashboard')
+            except Exception as e:
+                logger.error(f"Error broadcasting {len(batch)} trackers: {e}")
+
+def start_broadcaster():
+    """Start the batched tracker broadcaster"""
+    socketio.start_background_task(broadcast_trackers)
+
+def restore_snapshot():
+    """Copy the persistent snapshot into place if the live database is missing"""
+    if DB_SNAPSHOT_PATH and os.path.exists(DB_SNAPSHOT_PATH) and not os.path.exists(DB_PATH):
+        shutil.copyfile(DB_SNAPSHOT_PATH, DB_PATH)
+        logger.info(f"Restored database from snapshot {DB_SNAPSHOT_PATH}")
+
+def snapshot_database(conn):
+    """Write a consistent copy of the live database to DB_SNAPSHOT_PATH"""
+    os.makedirs(os.path.dirname(DB_SNAPSHOT_PATH) or '.', exist_ok=True)
+    tmp_path = f"{DB_SNAPSHOT_PATH}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn.execute('VACUUM INTO ?', (tmp_path,))
+    os.replace(tmp_path, DB_SNAPSHOT_PATH)
+
+def snapshot_writer():
+    """Snapshot thread: copy the database out every SNAPSHOT_INTERVAL seconds"""
+    while True:
+        time.sleep(SNAPSHOT_INTERVAL)
+        try:
+            run_db(snapshot_database)
+        except Exception as e:
+            logger.error(f"Error writing database snapshot: {e}")
+
+def final_snapshot():
+    """Snapshot once more at exit, in the calling thread"""
     with db_lock:
-        conn = get_db()
-        cursor = conn.cursor()
+        snapshot_database(get_db())
 
-        sixty_secs_ago = (datetime.now() - timedelta(seconds=60)).isoformat()
-        cursor.execute('''
-            SELECT domain, total_blocks, company, method, last_seen
-            FROM global_trackers
-            WHERE last_seen > ?
-            ORDER BY last_seen DESC
-            LIMIT 20
-        ''', (sixty_secs_ago,))
-
-        trackers = [{
-            'domain': row[0],
-            'blocks': row[1],
-            'company': row[2],
-            'method': row[3],
-            'time': row[4]
-        } for row in cursor.fetchall()]
-
-        conn.close()
-        return jsonify(trackers)
+def start_snapshots():
+    """Start periodic snapshots when PRIVACYSPACE_DB_SNAPSHOT is set"""
+    if not DB_SNAPSHOT_PATH:
+        return
+    Thread(target=snapshot_writer, name='db-snapshot', daemon=True).start()
+    atexit.register(final_snapshot)
+    logger.info(f"Snapshotting {DB_PATH} to {DB_SNAPSHOT_PATH} every {SNAPSHOT_INTERVAL}s")
 
 @app.route('/api/report', methods=['POST'])
 def report_tracker():
@@ -249,123 +668,93 @@ def report_tracker():
     # Identify company
     company = identify_company(domain)
 
-    with db_lock:
-        conn = get_db()
-        cursor = conn.cursor()
-
-        # Check if tracker exists
-        cursor.execute('SELECT id, total_blocks, unique_users FROM global_trackers WHERE domain = ?', (domain,))
-        existing = cursor.fetchone()
-
-        is_new = False
-        if existing:
-            # Update existing tracker
-            tracker_id = existing[0]
-            cursor.execute('''
-                UPDATE global_trackers
-                SET total_blocks = total_blocks + 1,
-                    last_seen = CURRENT_TIMESTAMP,
-                    company = COALESCE(company, ?),
-                    method = COALESCE(method, ?)
-                WHERE domain = ?
-            ''', (company, method, domain))
-        else:
-            # New tracker discovered!
-            is_new = True
-            cursor.execute('''
-                INSERT INTO global_trackers (domain, company, method, confidence, category)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (domain, company, method, confidence, 'tracker'))
-            tracker_id = cursor.lastrowid
-
-        # Log the report
-        cursor.execute('''
-            INSERT INTO tracker_reports (user_id, domain, method, confidence, context)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (user_id, domain, method, confidence, json.dumps(context)))
-
-        # Update user record
-        cursor.execute('''
-            INSERT INTO active_users (user_id, last_seen, total_reports, privacy_score)
-            VALUES (?, CURRENT_TIMESTAMP, 1, 10)
-            ON CONFLICT(user_id) DO UPDATE SET
-                last_seen = CURRENT_TIMESTAMP,
-                total_reports = total_reports + 1,
-                privacy_score = privacy_score + 10
-        ''', (user_id,))
-
-        # Update company stats
-        if company != 'Unknown':
-            cursor.execute('''
-                INSERT INTO companies (name, total_trackers, total_blocks, last_activity)
-                VALUES (?, 1, 1, CURRENT_TIMESTAMP)
-                ON CONFLICT(name) DO UPDATE SET
-                    total_blocks = total_blocks + 1,
-                    last_activity = CURRENT_TIMESTAMP
-            ''', (company,))
-
-        conn.commit()
-        conn.close()
-
-    # Broadcast to all connected clients
-    socketio.emit('new_tracker', {
-        'domain': domain,
-        'company': company,
-        'method': method,
-        'is_new': is_new,
-        'timestamp': datetime.now().isoformat()
-    }, broadcast=True)
+    with known_trackers_lock:
+        is_new = domain not in known_trackers
+        if is_new:
+            known_trackers.add(domain)
+
+    # Written to the database by the report writer thread
+    report_queue.put((user_id, domain, method, confidence, context, company, is_new))
+
+    # Broadcast to all connected clients with the next batch
+    with broadcast_lock:
+        pending_broadcasts.append({
+            'domain': domain,
+            'company': company,
+            'method': method,
+            'is_new': is_new,
+            'timestamp': datetime.now().isoformat()
+        })
 
     logger.info(f"{'NEW' if is_new else 'Updated'} tracker: {domain} (company: {company})")
 
     return jsonify({
         'success': True,
         'is_new': is_new,
-        'tracker_id': tracker_id,
         'message': 'Tracker reported successfully'
     })
 
 @app.route('/api/blocklist')
 def get_blocklist():
-    """Get current global blocklist"""
-    with db_lock:
-        conn = get_db()
+    """Get current global blocklist
+
+    Clients sending Accept: application/x-ndjson get one tracker per line,
+    streamed straight from the cursor.
+    """
+    if 'application/x-ndjson' in request.headers.get('Accept', ''):
+        return Response(stream_with_context(stream_blocklist()), mimetype='application/x-ndjson')
+    return cached_json_response('blocklist', BLOCKLIST_CACHE_TTL, build_blocklist, blocklist_version)
+
+def stream_blocklist():
+    """Yield the global blocklist as newline-delimited JSON"""
+    # The cursor keeps its pooled connection for the whole stream; it goes
+    # back to the pool when the response finishes or the client goes away
+    conn = read_pool.get()
+    try:
         cursor = conn.cursor()
-
-        cursor.execute('''
-            SELECT domain, company, total_blocks, confidence
-            FROM global_trackers
-            WHERE auto_block = 1
-            ORDER BY total_blocks DESC
-        ''')
-
-        blocklist = [{
-            'domain': row[0],
-            'company': row[1],
-            'blocks': row[2],
-            'confidence': row[3]
-        } for row in cursor.fetchall()]
-
-        conn.close()
-        return jsonify({
-            'count': len(blocklist),
-            'blocklist': blocklist,
-            'generated': datetime.now().isoformat()
-        })
+        cursor.arraysize = 1000
+        rows = call_db(execute_fetchmany, cursor, SQL_BLOCKLIST)
+        while rows:
+            for row in rows:
+                yield dumps_json({
+                    'domain': row[0],
+                    'company': row[1],
+                    'blocks': row[2],
+                    'confidence': row[3]
+                }) + b'\n'
+            rows = call_db(cursor.fetchmany)
+        cursor.close()
+    finally:
+        read_pool.put(conn)
+
+def build_blocklist():
+    """Query the global blocklist"""
+    rows = run_read(fetch_all, SQL_BLOCKLIST)
+
+    blocklist = [{
+        'domain': row[0],
+        'company': row[1],
+        'blocks': row[2],
+        'confidence': row[3]
+    } for row in rows]
+
+    return {
+        'count': len(blocklist),
+        'blocklist': blocklist,
+        'generated': datetime.now().isoformat()
+    }
 
 @socketio.on('connect')
 def handle_connect():
     """Handle client connection"""
     logger.info(f"Client connected: {request.sid}")
+    if request.args.get('view') == 'dashboard':
+        join_room('dashboard')
     emit('connected', {'message': 'Connected to PrivacySpace'})
 
     # Send initial stats
-    with db_lock:
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute('SELECT COUNT(*) FROM global_trackers')
-        total_trackers = cursor.fetchone()[0]
-        conn.close()
+    with known_trackers_lock:
+        total_trackers = len(known_trackers)
 
     emit('stats_update', {'total_trackers': total_trackers})
 
@@ -374,23 +763,23 @@ def handle_disconnect():
     """Handle client disconnection"""
     logger.info(f"Client disconnected: {request.sid}")
 
+def touch_user(conn, user_id):
+    """Mark a user as seen now"""
+    with conn:
+        conn.execute(SQL_TOUCH_USER, (user_id,))
+
 @socketio.on('subscribe')
 def handle_subscribe(data):
     """Handle client subscription to updates"""
     user_id = data.get('user_id', 'anonymous')
     logger.info(f"User subscribed: {user_id}")
+    join_room('trackers')
 
     # Update active users
-    with db_lock:
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO active_users (user_id, last_seen)
-            VALUES (?, CURRENT_TIMESTAMP)
-            ON CONFLICT(user_id) DO UPDATE SET last_seen = CURRENT_TIMESTAMP
-        ''', (user_id,))
-        conn.commit()
-        conn.close()
+    run_db(touch_user, user_id)
+
+    with stats_lock:
+        stats_cache['active_users'][user_id] = time.time()
 
     emit('subscribed', {'user_id': user_id, 'message': 'Subscribed to updates'})
 
@@ -402,8 +791,18 @@ if __name__ == '__main__':
     print("  Version: 1.0.0")
     print("="*70)
 
+    debug = True
+
     # Initialize database
     init_database()
+    start_report_writer()
+    start_broadcaster()
+
+    # In debug mode the reloader runs this script twice: a watcher parent
+    # and the serving child, which has WERKZEUG_RUN_MAIN set. Only the
+    # serving process snapshots the database
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_snapshots()
 
     print("\n  Starting server...")
     print("  📊 Dashboard: http://localhost:5000")
@@ -414,4 +813,4 @@ if __name__ == '__main__':
     print("="*70 + "\n")
 
     # Run server
-    socketio.run(app, host='0.0.0.0', port=5000, debug=True, allow_unsafe_werkzeug=True)
+    socketio.run(app, host='0.0.0.0', port=5000, debug=debug, allow_unsafe_werkzeug=True)
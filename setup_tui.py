@@ -14,72 +14,278 @@
 
 import sys
 import os
+import functools
+import importlib.util
 import subprocess
 import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import NamedTuple, Optional
 import time
 import platform
 
-try:
-    from rich.console import Console
-    from rich.panel import Panel
-    from rich.prompt import Prompt, Confirm
-    from rich.progress import Progress, SpinnerColumn, TextColumn
-    from rich.table import Table
-    from rich.markdown import Markdown
-    from rich import box
-    from rich.layout import Layout
-    from rich.text import Text
-except ImportError:
+
+def ensure_rich():
+    """Install rich if it is missing (set RICH_SKIP_INSTALL=1 to only report it)"""
+    if importlib.util.find_spec("rich") is not None:
+        return
+
     print("Error: 'rich' library not found.")
+    if os.environ.get("RICH_SKIP_INSTALL"):
+        print("Install it with: pip install rich")
+        sys.exit(1)
+
     print("Installing rich...")
-    subprocess.run([sys.executable, "-m", "pip", "install", "rich"], check=True)
-    from rich.console import Console
-    from rich.panel import Panel
-    from rich.prompt import Prompt, Confirm
-    from rich.progress import Progress, SpinnerColumn, TextColumn
-    from rich.table import Table
-    from rich.markdown import Markdown
-    from rich import box
-    from rich.text import Text
+    subprocess.run(
+        [sys.executable, "-m", "pip", "install",
+         "--disable-pip-version-check", "--no-compile", "--quiet", "rich"],
+        check=True
+    )
+    importlib.invalidate_caches()
+
+
+# The wizard cannot draw anything without rich, so make sure it is there
+# before importing it
+ensure_rich()
+
+from rich.console import Console
+from rich.panel import Panel
+from rich.prompt import Prompt, Confirm
+from rich.progress import Progress, SpinnerColumn, TextColumn
+from rich.table import Table
+from rich import box
+
+# Fixed for the life of the process, so checked once
+IS_WINDOWS = platform.system() == "Windows"
+PY_OK = sys.version_info >= (3, 10)
+
+# ASCII art for the first and last screens
+WELCOME_BANNER = """
+    ╔══════════════════════════════════════════════════════════════════════╗
+    ║                                                                      ║
+    ║               🛡️  PRIVACY PROXY SETUP WIZARD  🛡️                    ║
+    ║                                                                      ║
+    ║            Browser Anonymization & Tracker Blocking Tool            ║
+    ║                          Version 1.0.0                               ║
+    ║                                                                      ║
+    ╚══════════════════════════════════════════════════════════════════════╝
+        """
+COMPLETION_BANNER = """
+    ╔══════════════════════════════════════════════════════════════════════╗
+    ║                                                                      ║
+    ║                    ✓ SETUP COMPLETE! ✓                              ║
+    ║                                                                      ║
+    ║              Privacy Proxy is ready to use!                          ║
+    ║                                                                      ║
+    ╚══════════════════════════════════════════════════════════════════════╝
+        """
 
-console = Console()
+# The banners wrapped in their ANSI styles, built once
+_BANNERS_ANSI = {
+    WELCOME_BANNER: f"\x1b[1;36m{WELCOME_BANNER}\x1b[0m\n",
+    COMPLETION_BANNER: f"\x1b[1;32m{COMPLETION_BANNER}\x1b[0m\n",
+}
+
+# Bytes of the install log shown when dependency installation fails
+INSTALL_LOG_TAIL = 4000
+
+# Configuration written by the wizard; save_configuration fills in the
+# privacy-level settings
+_CONFIG_TEMPLATE = {
+    "proxy": {
+        "host": "127.0.0.1",
+        "port": 8080,
+        "https_port": 8081
+    },
+    "fingerprint": {
+        "rotation_mode": "every_request",
+        "rotation_interval": 300,
+        "randomize_user_agent": True,
+        "randomize_accept_language": True,
+        "randomize_accept_encoding": True,
+        "randomize_platform": True,
+        "strip_referer": True,
+        "randomize_dnt": True,
+        "strip_headers": [
+            "X-Forwarded-For",
+            "X-Real-IP",
+            "Via",
+            "X-Client-IP"
+        ]
+    },
+    "cookies": {
+        "block_all": True,
+        "log_attempts": True,
+        "auto_block_trackers": True
+    },
+    "blocking": {
+        "auto_block": True,
+        "auto_block_threshold": 3,
+        "use_builtin_lists": True,
+        "block_patterns": [
+            ".*analytics.*",
+            ".*doubleclick.*",
+            ".*facebook.*",
+            ".*google-analytics.*",
+            ".*googletagmanager.*",
+            ".*scorecardresearch.*",
+            ".*adservice.*",
+            ".*adsystem.*",
+            ".*advertising.*"
+        ]
+    },
+    "database": {
+        "path": "database/browser_privacy.db",
+        "log_requests": True,
+        "log_cookies": True,
+        "log_fingerprints": True,
+        "write_batch_size": 500,
+        "flush_interval": 0.05
+    },
+    "logging": {
+        "level": "INFO",
+        "file": "logs/privacy_proxy.log",
+        "console": True
+    },
+    "whitelist": [
+        "localhost",
+        "127.0.0.1"
+    ]
+}
+
+class PrivacyLevel(NamedTuple):
+    """One of the privacy presets offered in Step 5 (None fields are asked for)"""
+    name: str
+    desc: str
+    rotation_mode: Optional[str]
+    block_all: Optional[bool]
+    auto_block: Optional[bool]
+    threshold: Optional[int]
+
+
+# Privacy level options offered in Step 5; option N is PRIVACY_LEVELS[N - 1]
+PRIVACY_LEVELS = (
+    PrivacyLevel(
+        name="Maximum Privacy (Paranoid)",
+        desc="New fingerprint every request, block ALL cookies, aggressive blocking",
+        rotation_mode="every_request",
+        block_all=True,
+        auto_block=True,
+        threshold=1
+    ),
+    PrivacyLevel(
+        name="Balanced Privacy (Recommended)",
+        desc="Rotate every 5 minutes, block cookies, moderate blocking",
+        rotation_mode="interval",
+        block_all=True,
+        auto_block=True,
+        threshold=3
+    ),
+    PrivacyLevel(
+        name="Minimal Privacy (Testing)",
+        desc="Rotate on launch, log cookies but don't block, no auto-blocking",
+        rotation_mode="launch",
+        block_all=False,
+        auto_block=False,
+        threshold=10
+    ),
+    PrivacyLevel(
+        name="Custom Configuration",
+        desc="Configure settings manually",
+        rotation_mode=None,
+        block_all=None,
+        auto_block=None,
+        threshold=None
+    ),
+)
+
+
+@functools.lru_cache(maxsize=None)
+def privacy_table():
+    """Build the Step 5 options table (static, so built only once)"""
+    table = Table(box=box.ROUNDED)
+    table.add_column("Option", style="cyan", justify="center")
+    table.add_column("Privacy Level", style="bold magenta")
+    table.add_column("Description", style="yellow")
+
+    for option, level in enumerate(PRIVACY_LEVELS, 1):
+        table.add_row(str(option), level.name, level.desc)
+    return table
 
 
 class PrivacyProxySetup:
     """Interactive TUI setup for Privacy Proxy"""
 
-    def __init__(self):
+    def __init__(self, assume_yes=False):
         self.console = Console()
+        # Unattended runs (--yes, PRIVACY_PROXY_YES=1 or no TTY) skip pauses
+        # and take the default answer to every question
+        self.interactive = (
+            sys.stdin.isatty()
+            and not assume_yes
+            and not os.environ.get("PRIVACY_PROXY_YES")
+        )
         self.base_dir = Path.cwd()
         self.venv_path = self.base_dir / ".venv"
         self.config_path = self.base_dir / "config" / "config.yaml"
         self.db_path = self.base_dir / "database" / "browser_privacy.db"
         self.logs_path = self.base_dir / "logs"
-        self.is_windows = platform.system() == "Windows"
+        self.is_windows = IS_WINDOWS
+
+        # Venv executables, resolved once for this platform
+        scripts = "Scripts" if self.is_windows else "bin"
+        exe = ".exe" if self.is_windows else ""
+        self.pip_path = self.venv_path / scripts / f"pip{exe}"
+        self.python_path = self.venv_path / scripts / f"python{exe}"
+
+    def pause(self):
+        """Wait for Enter between steps (interactive runs only)"""
+        if self.interactive:
+            input("\nPress Enter to continue...")
+
+    def confirm(self, prompt, default):
+        """Ask a yes/no question, or take the default when unattended"""
+        if self.interactive:
+            return Confirm.ask(prompt, default=default)
+        return default
+
+    def ask(self, prompt, default, **kwargs):
+        """Ask for a value, or take the default when unattended"""
+        if self.interactive:
+            return Prompt.ask(prompt, default=default, **kwargs)
+        return default
 
     def clear_screen(self):
         """Clear the terminal screen"""
-        os.system('cls' if self.is_windows else 'clear')
+        # Rich writes the ANSI clear sequence (or uses the Win32 API on
+        # legacy consoles) instead of spawning a cls/clear shell
+        self.console.clear()
+
+    def print_banner(self, banner, style):
+        """Print static ASCII art
+
+        On ANSI terminals the pre-rendered escape string is written directly,
+        skipping Rich's markup and layout work; elsewhere Rich prints it.
+        """
+        console = self.console
+        if console.is_terminal and console.color_system and not console.legacy_windows:
+            console.file.write(_BANNERS_ANSI[banner])
+            console.file.flush()
+        else:
+            console.print(banner, style=style, markup=False, highlight=False)
 
     def show_banner(self):
         """Display welcome banner"""
         self.clear_screen()
-        banner = """
-    ╔══════════════════════════════════════════════════════════════════════╗
-    ║                                                                      ║
-    ║               🛡️  PRIVACY PROXY SETUP WIZARD  🛡️                    ║
-    ║                                                                      ║
-    ║            Browser Anonymization & Tracker Blocking Tool            ║
-    ║                          Version 1.0.0                               ║
-    ║                                                                      ║
-    ╚══════════════════════════════════════════════════════════════════════╝
-        """
-        self.console.print(banner, style="bold cyan")
-        self.console.print("\n[bold green]Welcome to the Privacy Proxy Interactive Setup![/bold green]\n")
-        self.console.print("This wizard will guide you through the installation and configuration.\n")
+        self.print_banner(WELCOME_BANNER, "bold cyan")
 
-        if not Confirm.ask("Ready to begin?", default=True):
+        # Buffer the rest of the screen and write it once
+        with self.console:
+            self.console.print("\n[bold green]Welcome to the Privacy Proxy Interactive Setup![/bold green]\n")
+            self.console.print("This wizard will guide you through the installation and configuration.\n")
+
+        if not self.confirm("Ready to begin?", default=True):
             self.console.print("[yellow]Setup cancelled.[/yellow]")
             sys.exit(0)
 
@@ -95,21 +301,26 @@ class PrivacyProxySetup:
 
         # Check Python version
         py_version = sys.version_info
-        if py_version >= (3, 10):
+        if PY_OK:
             checks.append(("Python 3.10+", True, f"{py_version.major}.{py_version.minor}.{py_version.micro}"))
         else:
             checks.append(("Python 3.10+", False, f"{py_version.major}.{py_version.minor}.{py_version.micro} (too old)"))
 
+        # Look up all tools at once; each lookup stats its way along PATH
+        tools = ("uv", "pip", "git")
+        with ThreadPoolExecutor(max_workers=len(tools)) as executor:
+            found = dict(zip(tools, executor.map(shutil.which, tools)))
+
         # Check for uv
-        uv_available = shutil.which("uv") is not None
+        uv_available = found["uv"] is not None
         checks.append(("uv package manager", uv_available, "Found" if uv_available else "Not found"))
 
         # Check for pip
-        pip_available = shutil.which("pip") is not None
+        pip_available = found["pip"] is not None
         checks.append(("pip", pip_available, "Found" if pip_available else "Not found"))
 
         # Check for git
-        git_available = shutil.which("git") is not None
+        git_available = found["git"] is not None
         checks.append(("git", git_available, "Found" if git_available else "Not found (optional)"))
 
         # Display results
@@ -123,21 +334,74 @@ class PrivacyProxySetup:
             style = "green" if passed else "red"
             table.add_row(name, f"[{style}]{status}[/{style}]", details)
 
-        self.console.print(table)
-
-        # Check critical requirements
-        if not (py_version >= (3, 10) and (uv_available or pip_available)):
-            self.console.print("\n[bold red]✗ Critical requirements not met![/bold red]")
-            self.console.print("\nPlease install:")
-            if py_version < (3, 10):
-                self.console.print("  - Python 3.10 or higher")
-            if not (uv_available or pip_available):
-                self.console.print("  - pip or uv package manager")
-            sys.exit(1)
+        # Render the results as one write
+        with self.console:
+            self.console.print(table)
+
+            # Check critical requirements
+            if not (PY_OK and (uv_available or pip_available)):
+                self.console.print("\n[bold red]✗ Critical requirements not met![/bold red]")
+                self.console.print("\nPlease install:")
+                if not PY_OK:
+                    self.console.print("  - Python 3.10 or higher")
+                if not (uv_available or pip_available):
+                    self.console.print("  - pip or uv package manager")
+                sys.exit(1)
 
-        self.console.print("\n[bold green]✓ All critical checks passed![/bold green]")
+            self.console.print("\n[bold green]✓ All critical checks passed![/bold green]")
         self.package_manager = "uv" if uv_available else "pip"
-        input("\nPress Enter to continue...")
+        self.pause()
+
+    def run_with_spinner(self, description, cmd, log_path=None):
+        """Run a command behind a spinner, raising CalledProcessError on failure
+
+        The spinner is redrawn from the wait loop itself, so Rich needs no
+        refresh thread while the command runs. With log_path, the command's
+        output goes straight to that file instead of through this process.
+        """
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            console=self.console,
+            auto_refresh=False,
+        ) as progress:
+            progress.add_task(description, total=None)
+
+            if log_path is None:
+                proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            else:
+                log_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(log_path, "wb") as log_file:
+                    proc = subprocess.Popen(cmd, stdout=log_file, stderr=subprocess.STDOUT)
+            while True:
+                try:
+                    stdout, stderr = proc.communicate(timeout=0.1)
+                    break
+                except subprocess.TimeoutExpired:
+                    progress.refresh()
+
+        if proc.returncode:
+            raise subprocess.CalledProcessError(proc.returncode, cmd, stdout, stderr)
+
+    def remove_in_background(self, path):
+        """Move a directory tree aside and delete it on a background thread
+
+        The thread is not a daemon, so the wizard waits for the delete to
+        finish before exiting.
+        """
+        doomed = path.with_name(f"{path.name}.old.{os.getpid()}")
+        try:
+            os.rename(path, doomed)
+        except OSError:
+            # Could not move it (e.g. files in use on Windows); delete in place
+            shutil.rmtree(path)
+            return
+        threading.Thread(
+            target=shutil.rmtree,
+            args=(doomed,),
+            kwargs={"ignore_errors": True},
+            name="remove-old-venv"
+        ).start()
 
     def create_virtual_environment(self):
         """Create virtual environment"""
@@ -149,34 +413,27 @@ class PrivacyProxySetup:
 
         if self.venv_path.exists():
             self.console.print(f"[yellow]Virtual environment already exists at:[/yellow] {self.venv_path}")
-            if Confirm.ask("Delete and recreate?", default=False):
-                shutil.rmtree(self.venv_path)
+            if self.confirm("Delete and recreate?", default=False):
+                self.remove_in_background(self.venv_path)
             else:
                 self.console.print("[green]Using existing virtual environment.[/green]")
-                input("\nPress Enter to continue...")
+                self.pause()
                 return
 
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=self.console,
-        ) as progress:
-            task = progress.add_task("Creating virtual environment...", total=None)
-
-            try:
-                if self.package_manager == "uv":
-                    subprocess.run(["uv", "venv", ".venv"], check=True, capture_output=True)
-                else:
-                    subprocess.run([sys.executable, "-m", "venv", ".venv"], check=True, capture_output=True)
+        try:
+            if self.package_manager == "uv":
+                cmd = ["uv", "venv", ".venv"]
+            else:
+                cmd = [sys.executable, "-m", "venv", ".venv"]
+            self.run_with_spinner("Creating virtual environment...", cmd)
 
-                progress.update(task, completed=True)
-                self.console.print("\n[bold green]✓ Virtual environment created successfully![/bold green]")
-            except subprocess.CalledProcessError as e:
-                self.console.print(f"\n[bold red]✗ Failed to create virtual environment![/bold red]")
-                self.console.print(f"Error: {e}")
-                sys.exit(1)
+            self.console.print("\n[bold green]✓ Virtual environment created successfully![/bold green]")
+        except subprocess.CalledProcessError as e:
+            self.console.print(f"\n[bold red]✗ Failed to create virtual environment![/bold red]")
+            self.console.print(f"Error: {e}")
+            sys.exit(1)
 
-        input("\nPress Enter to continue...")
+        self.pause()
 
     def install_dependencies(self):
         """Install Python dependencies"""
@@ -186,53 +443,40 @@ class PrivacyProxySetup:
             border_style="cyan"
         ))
 
-        # Determine pip path
-        if self.is_windows:
-            pip_path = self.venv_path / "Scripts" / "pip.exe"
-            python_path = self.venv_path / "Scripts" / "python.exe"
-        else:
-            pip_path = self.venv_path / "bin" / "pip"
-            python_path = self.venv_path / "bin" / "python"
-
         requirements_file = self.base_dir / "requirements.txt"
 
         if not requirements_file.exists():
             self.console.print("[bold red]✗ requirements.txt not found![/bold red]")
             sys.exit(1)
 
-        self.console.print(f"Installing packages from: {requirements_file}\n")
-
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=self.console,
-        ) as progress:
-            task = progress.add_task("Installing dependencies (this may take a few minutes)...", total=None)
-
-            try:
-                if self.package_manager == "uv":
-                    subprocess.run(
-                        ["uv", "pip", "install", "-r", str(requirements_file)],
-                        check=True,
-                        capture_output=True,
-                        text=True
-                    )
-                else:
-                    subprocess.run(
-                        [str(pip_path), "install", "-r", str(requirements_file)],
-                        check=True,
-                        capture_output=True,
-                        text=True
-                    )
+        log_path = self.logs_path / "install.log"
+        self.console.print(f"Installing packages from: {requirements_file}")
+        self.console.print(f"Installer output: {log_path}\n")
 
-                progress.update(task, completed=True)
-                self.console.print("\n[bold green]✓ Dependencies installed successfully![/bold green]")
-            except subprocess.CalledProcessError as e:
-                self.console.print(f"\n[bold red]✗ Failed to install dependencies![/bold red]")
-                self.console.print(f"Error output: {e.stderr if hasattr(e, 'stderr') else str(e)}")
-                sys.exit(1)
+        try:
+            # One batched install; pip skips its version check and .pyc compilation
+            if self.package_manager == "uv":
+                cmd = ["uv", "pip", "install", "--no-progress", "-r", str(requirements_file)]
+            else:
+                cmd = [
+                    str(self.pip_path), "install",
+                    "--disable-pip-version-check", "--no-compile",
+                    "-r", str(requirements_file)
+                ]
+            self.run_with_spinner("Installing dependencies (this may take a few minutes)...", cmd, log_path)
+
+            self.console.print("\n[bold green]✓ Dependencies installed successfully![/bold green]")
+        except subprocess.CalledProcessError as e:
+            self.console.print(f"\n[bold red]✗ Failed to install dependencies![/bold red]")
+            self.console.print(f"Error: {e}")
+            self.console.print(f"Last lines of {log_path}:\n")
+            # Raw output: written as-is rather than through Rich's markup parser
+            with open(log_path, "rb") as f:
+                f.seek(max(0, f.seek(0, os.SEEK_END) - INSTALL_LOG_TAIL))
+                sys.stderr.write(f.read().decode(errors="replace"))
+            sys.exit(1)
 
-        input("\nPress Enter to continue...")
+        self.pause()
 
     def setup_directories(self):
         """Create necessary directories"""
@@ -254,177 +498,96 @@ class PrivacyProxySetup:
         table.add_column("Status", style="green")
 
         for directory, purpose in directories:
-            if directory.exists():
-                status = "✓ Exists"
-            else:
-                directory.mkdir(parents=True, exist_ok=True)
+            # mkdir alone tells us whether it was already there
+            try:
+                directory.mkdir(parents=True)
                 status = "✓ Created"
+            except FileExistsError:
+                status = "✓ Exists"
             table.add_row(str(directory.relative_to(self.base_dir)), purpose, status)
 
-        self.console.print(table)
-        self.console.print("\n[bold green]✓ All directories ready![/bold green]")
-        input("\nPress Enter to continue...")
+        # Render the results as one write
+        with self.console:
+            self.console.print(table)
+            self.console.print("\n[bold green]✓ All directories ready![/bold green]")
+        self.pause()
 
     def configure_privacy_level(self):
         """Interactive privacy level configuration"""
         self.clear_screen()
-        self.console.print(Panel.fit(
-            "[bold]Step 5/7: Privacy Configuration[/bold]",
-            border_style="cyan"
-        ))
 
-        self.console.print("\n[bold]Select your privacy level:[/bold]\n")
-
-        # Privacy level options
-        levels = {
-            "1": {
-                "name": "Maximum Privacy (Paranoid)",
-                "desc": "New fingerprint every request, block ALL cookies, aggressive blocking",
-                "rotation_mode": "every_request",
-                "block_all": True,
-                "auto_block": True,
-                "threshold": 1
-            },
-            "2": {
-                "name": "Balanced Privacy (Recommended)",
-                "desc": "Rotate every 5 minutes, block cookies, moderate blocking",
-                "rotation_mode": "interval",
-                "block_all": True,
-                "auto_block": True,
-                "threshold": 3
-            },
-            "3": {
-                "name": "Minimal Privacy (Testing)",
-                "desc": "Rotate on launch, log cookies but don't block, no auto-blocking",
-                "rotation_mode": "launch",
-                "block_all": False,
-                "auto_block": False,
-                "threshold": 10
-            },
-            "4": {
-                "name": "Custom Configuration",
-                "desc": "Configure settings manually",
-                "rotation_mode": None,
-                "block_all": None,
-                "auto_block": None,
-                "threshold": None
-            }
-        }
-
-        table = Table(box=box.ROUNDED)
-        table.add_column("Option", style="cyan", justify="center")
-        table.add_column("Privacy Level", style="bold magenta")
-        table.add_column("Description", style="yellow")
-
-        for key, level in levels.items():
-            table.add_row(key, level["name"], level["desc"])
-
-        self.console.print(table)
-
-        choice = Prompt.ask("\nSelect option", choices=["1", "2", "3", "4"], default="2")
-
-        selected = levels[choice]
+        # Render the header, intro and options table as one write
+        with self.console:
+            self.console.print(Panel.fit(
+                "[bold]Step 5/7: Privacy Configuration[/bold]",
+                border_style="cyan"
+            ))
+
+            self.console.print("\n[bold]Select your privacy level:[/bold]\n")
+            self.console.print(privacy_table())
+
+        choice = self.ask("\nSelect option", choices=["1", "2", "3", "4"], default="2")
+
+        selected = PRIVACY_LEVELS[int(choice) - 1]
 
         if choice == "4":
             # Custom configuration
             self.console.print("\n[bold]Custom Configuration:[/bold]\n")
 
-            rotation_mode = Prompt.ask(
+            rotation_mode = self.ask(
                 "Fingerprint rotation mode",
                 choices=["every_request", "interval", "new_tab", "launch"],
                 default="interval"
             )
 
-            block_all = Confirm.ask("Block ALL cookies?", default=True)
-            auto_block = Confirm.ask("Enable auto-blocking?", default=True)
+            block_all = self.confirm("Block ALL cookies?", default=True)
+            auto_block = self.confirm("Enable auto-blocking?", default=True)
 
             if auto_block:
-                threshold = int(Prompt.ask("Auto-block threshold (hits)", default="3"))
+                threshold = int(self.ask("Auto-block threshold (hits)", default="3"))
             else:
                 threshold = 999
 
-            config_values = {
-                "rotation_mode": rotation_mode,
-                "block_all": block_all,
-                "auto_block": auto_block,
-                "threshold": threshold
-            }
+            config_values = selected._replace(
+                rotation_mode=rotation_mode,
+                block_all=block_all,
+                auto_block=auto_block,
+                threshold=threshold
+            )
         else:
             config_values = selected
 
         # Save configuration
         self.save_configuration(config_values)
 
-        self.console.print(f"\n[bold green]✓ Configuration saved:[/bold green] {selected['name']}")
-        input("\nPress Enter to continue...")
+        self.console.print(f"\n[bold green]✓ Configuration saved:[/bold green] {selected.name}")
+        self.pause()
 
     def save_configuration(self, values):
         """Save configuration to YAML file"""
         import yaml
 
-        config = {
-            "proxy": {
-                "host": "127.0.0.1",
-                "port": 8080,
-                "https_port": 8081
-            },
-            "fingerprint": {
-                "rotation_mode": values["rotation_mode"] or "every_request",
-                "rotation_interval": 300,
-                "randomize_user_agent": True,
-                "randomize_accept_language": True,
-                "randomize_accept_encoding": True,
-                "randomize_platform": True,
-                "strip_referer": True,
-                "randomize_dnt": True,
-                "strip_headers": [
-                    "X-Forwarded-For",
-                    "X-Real-IP",
-                    "Via",
-                    "X-Client-IP"
-                ]
-            },
-            "cookies": {
-                "block_all": values["block_all"] if values["block_all"] is not None else True,
-                "log_attempts": True,
-                "auto_block_trackers": True
-            },
-            "blocking": {
-                "auto_block": values["auto_block"] if values["auto_block"] is not None else True,
-                "auto_block_threshold": values["threshold"] or 3,
-                "use_builtin_lists": True,
-                "block_patterns": [
-                    ".*analytics.*",
-                    ".*doubleclick.*",
-                    ".*facebook.*",
-                    ".*google-analytics.*",
-                    ".*googletagmanager.*",
-                    ".*scorecardresearch.*",
-                    ".*adservice.*",
-                    ".*adsystem.*",
-                    ".*advertising.*"
-                ]
-            },
-            "database": {
-                "path": "database/browser_privacy.db",
-                "log_requests": True,
-                "log_cookies": True,
-                "log_fingerprints": True
-            },
-            "logging": {
-                "level": "INFO",
-                "file": "logs/privacy_proxy.log",
-                "console": True
-            },
-            "whitelist": [
-                "localhost",
-                "127.0.0.1"
-            ]
-        }
+        # Start from the template; only the privacy-level choices vary
+        config = dict(_CONFIG_TEMPLATE)
+        config["fingerprint"] = dict(
+            _CONFIG_TEMPLATE["fingerprint"],
+            rotation_mode=values.rotation_mode or "every_request"
+        )
+        config["cookies"] = dict(
+            _CONFIG_TEMPLATE["cookies"],
+            block_all=values.block_all if values.block_all is not None else True
+        )
+        config["blocking"] = dict(
+            _CONFIG_TEMPLATE["blocking"],
+            auto_block=values.auto_block if values.auto_block is not None else True,
+            auto_block_threshold=values.threshold or 3
+        )
 
         self.config_path.parent.mkdir(parents=True, exist_ok=True)
         with open(self.config_path, 'w') as f:
-            yaml.dump(config, f, default_flow_style=False, sort_keys=False)
+            # libyaml's C dumper when available
+            dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+            yaml.dump(config, f, Dumper=dumper, default_flow_style=False, sort_keys=False)
 
     def initialize_database(self):
         """Initialize SQLite database"""
@@ -436,12 +599,12 @@ class PrivacyProxySetup:
 
         if self.db_path.exists():
             self.console.print(f"[yellow]Database already exists:[/yellow] {self.db_path}")
-            if not Confirm.ask("Keep existing database?", default=True):
+            if not self.confirm("Keep existing database?", default=True):
                 self.db_path.unlink()
                 self.console.print("[yellow]Deleted existing database.[/yellow]")
             else:
                 self.console.print("[green]Using existing database.[/green]")
-                input("\nPress Enter to continue...")
+                self.pause()
                 return
 
         with Progress(
@@ -452,8 +615,10 @@ class PrivacyProxySetup:
             task = progress.add_task("Initializing database...", total=None)
 
             try:
-                # Initialize database using database_handler
-                sys.path.insert(0, str(self.base_dir))
+                # Initialize database using database_handler; add the project
+                # to sys.path only once so repeated runs don't grow it
+                if str(self.base_dir) not in sys.path:
+                    sys.path.insert(0, str(self.base_dir))
                 from database_handler import DatabaseHandler
 
                 db = DatabaseHandler(str(self.db_path))
@@ -472,7 +637,7 @@ class PrivacyProxySetup:
                 self.console.print(f"Error: {e}")
                 sys.exit(1)
 
-        input("\nPress Enter to continue...")
+        self.pause()
 
     def run_verification(self):
         """Verify installation"""
@@ -482,21 +647,19 @@ class PrivacyProxySetup:
             border_style="cyan"
         ))
 
-        checks = []
-
-        # Check venv
-        checks.append(("Virtual Environment", self.venv_path.exists(), str(self.venv_path)))
-
-        # Check config
-        checks.append(("Configuration File", self.config_path.exists(), str(self.config_path)))
+        # Component, path to check, details
+        components = [
+            ("Virtual Environment", self.venv_path, str(self.venv_path)),
+            ("Configuration File", self.config_path, str(self.config_path)),
+            ("Database File", self.db_path, str(self.db_path)),
+            ("privacy_proxy.py", self.base_dir / "privacy_proxy.py", "Main proxy module"),
+            ("start_proxy.py", self.base_dir / "start_proxy.py", "Launcher script"),
+            ("manage.py", self.base_dir / "manage.py", "Management CLI"),
+        ]
 
-        # Check database
-        checks.append(("Database File", self.db_path.exists(), str(self.db_path)))
+        exists = self.paths_exist([path for _, path, _ in components])
 
-        # Check main files
-        checks.append(("privacy_proxy.py", (self.base_dir / "privacy_proxy.py").exists(), "Main proxy module"))
-        checks.append(("start_proxy.py", (self.base_dir / "start_proxy.py").exists(), "Launcher script"))
-        checks.append(("manage.py", (self.base_dir / "manage.py").exists(), "Management CLI"))
+        checks = [(name, found, details) for (name, _, details), found in zip(components, exists)]
 
         # Display results
         table = Table(title="Installation Verification", box=box.ROUNDED)
@@ -512,30 +675,37 @@ class PrivacyProxySetup:
             if not passed:
                 all_passed = False
 
-        self.console.print(table)
-
-        if all_passed:
-            self.console.print("\n[bold green]✓ All components verified successfully![/bold green]")
-        else:
-            self.console.print("\n[bold yellow]⚠ Some components are missing. Setup may be incomplete.[/bold yellow]")
+        # Render the results as one write
+        with self.console:
+            self.console.print(table)
 
-        input("\nPress Enter to continue...")
+            if all_passed:
+                self.console.print("\n[bold green]✓ All components verified successfully![/bold green]")
+            else:
+                self.console.print("\n[bold yellow]⚠ Some components are missing. Setup may be incomplete.[/bold yellow]")
+
+        self.pause()
+
+    def paths_exist(self, paths):
+        """Check which paths exist, listing each parent directory only once"""
+        listings = {}
+        for path in paths:
+            if path.parent not in listings:
+                try:
+                    with os.scandir(path.parent) as entries:
+                        listings[path.parent] = {entry.name for entry in entries}
+                except OSError:
+                    listings[path.parent] = set()
+        return [path.name in listings[path.parent] for path in paths]
 
     def show_completion(self):
         """Show completion message and next steps"""
-        self.clear_screen()
+        # Only needed on this last screen, so not loaded at startup
+        from rich.markdown import Markdown
 
-        completion_text = """
-    ╔══════════════════════════════════════════════════════════════════════╗
-    ║                                                                      ║
-    ║                    ✓ SETUP COMPLETE! ✓                              ║
-    ║                                                                      ║
-    ║              Privacy Proxy is ready to use!                          ║
-    ║                                                                      ║
-    ╚══════════════════════════════════════════════════════════════════════╝
-        """
+        self.clear_screen()
 
-        self.console.print(completion_text, style="bold green")
+        self.print_banner(COMPLETION_BANNER, "bold green")
 
         # Next steps
         next_steps = """
@@ -603,11 +773,12 @@ python manage.py export blocklist.txt --format hosts
 Happy private browsing! 🛡️
         """
 
-        self.console.print(Markdown(next_steps))
+        with self.console:
+            self.console.print(Markdown(next_steps))
 
-        self.console.print("\n" + "="*70)
-        self.console.print("[bold cyan]Thank you for using Privacy Proxy![/bold cyan]")
-        self.console.print("="*70 + "\n")
+            self.console.print("\n" + "="*70)
+            self.console.print("[bold cyan]Thank you for using Privacy Proxy![/bold cyan]")
+            self.console.print("="*70 + "\n")
 
     def run(self):
         """Run the complete setup wizard"""
@@ -633,7 +804,7 @@ Happy private browsing! 🛡️
 
 def main():
     """Main entry point"""
-    setup = PrivacyProxySetup()
+    setup = PrivacyProxySetup(assume_yes=bool({"-y", "--yes"} & set(sys.argv[1:])))
     setup.run()
 
 
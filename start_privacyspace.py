@@ -12,18 +12,22 @@
 # execution: python start_privacyspace.py
 # ==============================================================================
 
+import os
 import sys
 import argparse
-import yaml
 from pathlib import Path
-from mitmproxy.tools.main import mitmdump
 
 
 def load_config(config_path):
     """Load configuration from YAML file"""
+    # Imported here so --help and argument errors don't pay for it
+    import yaml
+
+    # LibYAML's C loader when PyYAML was built with it, pure-Python otherwise
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
     try:
         with open(config_path, "r") as f:
-            return yaml.safe_load(f)
+            return yaml.load(f.read(), Loader=loader)
     except Exception as e:
         print(f"Error loading config: {e}")
         return {}
@@ -64,6 +68,11 @@ def main():
         default="regular",
         help="Proxy mode (default: regular)",
     )
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help="Run mitmdump inside this Python process (for debugging)",
+    )
 
     args = parser.parse_args()
 
@@ -127,7 +136,26 @@ def main():
     elif args.mode == "reverse":
         mitm_args.extend(["--mode", "reverse"])
 
-    # Run mitmdump
+    # Replace this process with mitmdump, so no wrapper interpreter stays
+    # resident for the whole session. The mitmdump next to this interpreter
+    # is used rather than one from PATH, so a venv run without activating
+    # it gets its own mitmproxy. Windows has no real exec, so it always
+    # runs in-process
+    mitmdump_path = Path(sys.executable).with_name("mitmdump")
+    if not args.in_process and os.name != "nt" and os.access(mitmdump_path, os.X_OK):
+        # exec discards anything still buffered, e.g. the banner when
+        # stdout is a pipe or file
+        sys.stdout.flush()
+        sys.stderr.flush()
+        try:
+            os.execv(mitmdump_path, [str(mitmdump_path)] + mitm_args)
+        except OSError:
+            pass  # fall back to running it here
+
+    # Run mitmdump (imported here: mitmproxy is slow to load, and --help
+    # or a bad config should not have to wait for it)
+    from mitmproxy.tools.main import mitmdump
+
     try:
         sys.argv = ["mitmdump"] + mitm_args
         mitmdump()
@@ -13,24 +13,151 @@
 # ==============================================================================
 
 import sys
-import argparse
-import yaml
+import types
 from pathlib import Path
-from mitmproxy.tools.main import mitmdump
+
+
+def _yaml_loader(yaml):
+    """LibYAML's C loader when PyYAML was built with it, pure-Python otherwise"""
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
 
 def load_config(config_path):
     """Load configuration from YAML file"""
+    # PyYAML is imported where it is used, so --help and argument errors
+    # don't pay for it
+    import yaml
+
     try:
         with open(config_path, "r") as f:
-            return yaml.safe_load(f)
+            return yaml.load(f, Loader=_yaml_loader(yaml))
     except Exception as e:
         print(f"Error loading config: {e}")
         return {}
 
 
-def main():
-    """Start the privacy proxy server"""
+def load_config_header(config_path, keys=("proxy",)):
+    """Load only the given top-level sections of a YAML config
+
+    Walks the parser's event stream, builds nodes for the wanted sections
+    only, and stops reading as soon as all of them have been seen. Files
+    it cannot handle this way (aliases, complex keys) or fails to parse are
+    handed to load_config(). Use load_config() for anything that needs the
+    whole file.
+    """
+    import yaml
+
+    resolver = yaml.resolver.Resolver()
+    wanted = set(keys)
+    config = {}
+    try:
+        with open(config_path, "r") as f:
+            events = yaml.parse(f, Loader=_yaml_loader(yaml))
+            # Advance to the top-level mapping
+            for event in events:
+                if isinstance(event, yaml.MappingStartEvent):
+                    break
+            else:
+                return config
+
+            for key_event in events:
+                if isinstance(key_event, yaml.MappingEndEvent):
+                    break
+                if not isinstance(key_event, yaml.ScalarEvent):
+                    raise yaml.YAMLError(f"Unsupported YAML key in config header: {key_event}")
+                value_event = next(events)
+                if key_event.value in wanted:
+                    node = _compose_node(resolver, value_event, events)
+                    config[key_event.value] = yaml.constructor.SafeConstructor().construct_document(node)
+                    wanted.discard(key_event.value)
+                    if not wanted:
+                        break
+                else:
+                    _skip_node(value_event, events)
+        return config
+    except Exception:
+        # The full loader reads what the event walk does not support, and
+        # reports real errors itself
+        config = load_config(config_path) or {}
+        return {key: config[key] for key in keys if key in config}
+
+
+def _compose_node(resolver, event, events):
+    """Build a YAML node from event and the events that follow it"""
+    import yaml
+
+    if isinstance(event, yaml.ScalarEvent):
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = resolver.resolve(yaml.ScalarNode, event.value, event.implicit)
+        return yaml.ScalarNode(tag, event.value, style=event.style)
+
+    if isinstance(event, yaml.SequenceStartEvent):
+        items = []
+        for child in events:
+            if isinstance(child, yaml.SequenceEndEvent):
+                break
+            items.append(_compose_node(resolver, child, events))
+        tag = event.tag or resolver.resolve(yaml.SequenceNode, None, event.implicit)
+        return yaml.SequenceNode(tag, items)
+
+    if isinstance(event, yaml.MappingStartEvent):
+        pairs = []
+        for child in events:
+            if isinstance(child, yaml.MappingEndEvent):
+                break
+            pairs.append((
+                _compose_node(resolver, child, events),
+                _compose_node(resolver, next(events), events),
+            ))
+        tag = event.tag or resolver.resolve(yaml.MappingNode, None, event.implicit)
+        return yaml.MappingNode(tag, pairs)
+
+    raise yaml.YAMLError(f"Unsupported YAML event in config header: {event}")
+
+
+def _skip_node(event, events):
+    """Consume the events of a node without building it"""
+    import yaml
+
+    depth = 0 if isinstance(event, (yaml.ScalarEvent, yaml.AliasEvent)) else 1
+    while depth:
+        event = next(events)
+        if isinstance(event, (yaml.SequenceStartEvent, yaml.MappingStartEvent)):
+            depth += 1
+        elif isinstance(event, (yaml.SequenceEndEvent, yaml.MappingEndEvent)):
+            depth -= 1
+
+
+PROXY_MODES = ("regular", "transparent", "socks5", "reverse")
+
+# Startup banner, written in one go
+BANNER = "\n".join([
+    "=" * 70,
+    "  PRIVACY PROXY - Browser Anonymization Tool",
+    "=" * 70,
+    "  Version: 1.0.0",
+    "  Host: {host}",
+    "  Port: {port}",
+    "  Mode: {mode}",
+    "  Config: {config_path}",
+    "=" * 70,
+    "",
+    "Configure your browser to use this proxy:",
+    "  HTTP Proxy: {host}:{port}",
+    "  HTTPS Proxy: {host}:{port}",
+    "",
+    "Press Ctrl+C to stop the proxy",
+    "=" * 70,
+    "",
+    "",
+])
+
+
+def build_parser():
+    """Build the full argparse parser, used for --help and bad arguments"""
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="Privacy Proxy - Browser Anonymization Tool"
     )
@@ -50,7 +177,7 @@ def main():
     )
     parser.add_argument(
         "--mode",
-        choices=["regular", "transparent", "socks5", "reverse"],
+        choices=PROXY_MODES,
         default="regular",
         help="Proxy mode (default: regular)",
     )
@@ -59,8 +186,50 @@ def main():
         action="store_true",
         help="Do not verify SSL certificates",
     )
+    return parser
+
+
+def parse_args(argv=None):
+    """Parse the command line
+
+    The handful of flags is scanned by hand so argparse is only imported
+    when it has something to report: --help, or an argument this loop does
+    not accept (argparse then prints the usual error).
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    args = types.SimpleNamespace(
+        config="config/config.yaml", port=None, host=None, mode="regular", no_ssl_insecure=False
+    )
+
+    i = 0
+    while i < len(argv):
+        name, eq, value = argv[i].partition("=")
+        if name == "--no-ssl-insecure" and not eq:
+            args.no_ssl_insecure = True
+            i += 1
+            continue
+        if name not in ("--config", "--port", "--host", "--mode"):
+            return build_parser().parse_args(argv)
+        if not eq:
+            i += 1
+            if i == len(argv) or argv[i].startswith("-"):
+                return build_parser().parse_args(argv)
+            value = argv[i]
+        if name == "--port":
+            if not value.isdecimal():
+                return build_parser().parse_args(argv)
+            value = int(value)
+        elif name == "--mode" and value not in PROXY_MODES:
+            return build_parser().parse_args(argv)
+        setattr(args, name[2:], value)
+        i += 1
 
-    args = parser.parse_args()
+    return args
+
+
+def main():
+    """Start the privacy proxy server"""
+    args = parse_args()
 
     # Load config
     config_path = Path(args.config)
@@ -75,32 +244,20 @@ def main():
             "logging": {"level": "INFO", "file": "logs/privacy_proxy.log"},
         }
         with open(config_path, "w") as f:
-            yaml.dump(default_config, f)
+            import yaml
+
+            # LibYAML's C dumper when PyYAML was built with it
+            yaml.dump(default_config, f, Dumper=getattr(yaml, "CSafeDumper", yaml.SafeDumper))
         print(f"Created default config at {config_path}")
 
-    config = load_config(config_path)
+    # Only the proxy section is needed here; the addon loads the full file
+    config = load_config_header(config_path)
 
     # Get host and port
     host = args.host or config.get("proxy", {}).get("host", "127.0.0.1")
     port = args.port or config.get("proxy", {}).get("port", 8080)
 
-    print("=" * 70)
-    print("  PRIVACY PROXY - Browser Anonymization Tool")
-    print("=" * 70)
-    print(f"  Version: 1.0.0")
-    print(f"  Host: {host}")
-    print(f"  Port: {port}")
-    print(f"  Mode: {args.mode}")
-    print(f"  Config: {config_path}")
-    print("=" * 70)
-    print()
-    print("Configure your browser to use this proxy:")
-    print(f"  HTTP Proxy: {host}:{port}")
-    print(f"  HTTPS Proxy: {host}:{port}")
-    print()
-    print("Press Ctrl+C to stop the proxy")
-    print("=" * 70)
-    print()
+    sys.stdout.write(BANNER.format(host=host, port=port, mode=args.mode, config_path=config_path))
 
     # Build mitmproxy arguments
     mitm_args = [
@@ -123,7 +280,10 @@ def main():
     elif args.mode == "reverse":
         mitm_args.extend(["--mode", "reverse"])
 
-    # Run mitmdump
+    # Run mitmdump (imported here: mitmproxy is slow to load, and --help
+    # or a bad config should not have to wait for it)
+    from mitmproxy.tools.main import mitmdump
+
     try:
         sys.argv = ["mitmdump"] + mitm_args
         mitmdump()
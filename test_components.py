@@ -30,11 +30,10 @@ try:
         sys.exit(1)
 
     with open(config_path, "r") as f:
-        config = yaml.safe_load(f)
+        config = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
 
-    assert "proxy" in config, "Missing 'proxy' section"
-    assert "fingerprint" in config, "Missing 'fingerprint' section"
-    assert "cookies" in config, "Missing 'cookies' section"
+    missing = {"proxy", "fingerprint", "cookies"} - config.keys()
+    assert not missing, f"Missing sections: {sorted(missing)}"
     print("      ✅ PASS: Configuration loaded successfully")
 except Exception as e:
     print(f"      ❌ FAIL: {e}")
@@ -45,6 +44,7 @@ print("[2/6] Testing database initialization...")
 try:
     from database_handler import DatabaseHandler
 
+    # One handler serves every test below; test 6 closes it and removes the file
     db = DatabaseHandler("database/test_browser_privacy.db")
     assert db is not None, "Database handler failed to initialize"
 
@@ -56,7 +56,6 @@ try:
     stats = db.get_statistics()
     assert isinstance(stats, dict), "Statistics should be a dict"
 
-    db.close()
     print("      ✅ PASS: Database initialized and tested")
 except Exception as e:
     print(f"      ❌ FAIL: {e}")
@@ -70,14 +69,13 @@ print("[3/6] Testing fingerprint randomizer...")
 try:
     from fingerprint_randomizer import FingerprintRandomizer
 
-    db = DatabaseHandler("database/test_browser_privacy.db")
     randomizer = FingerprintRandomizer(db, config)
 
     # Generate fingerprint
     fp1 = randomizer.generate_fingerprint("test")
     assert fp1 is not None, "Failed to generate fingerprint"
-    assert "user_agent" in fp1, "Missing user_agent"
-    assert "accept_language" in fp1, "Missing accept_language"
+    missing = {"user_agent", "accept_language"} - fp1.keys()
+    assert not missing, f"Missing fingerprint fields: {sorted(missing)}"
 
     # Generate another
     fp2 = randomizer.generate_fingerprint("test")
@@ -85,7 +83,6 @@ try:
     # We'll just check they both exist
     assert fp2 is not None, "Failed to generate second fingerprint"
 
-    db.close()
     print("      ✅ PASS: Fingerprint randomizer working")
 except Exception as e:
     print(f"      ❌ FAIL: {e}")
@@ -99,7 +96,6 @@ print("[4/6] Testing cookie interceptor...")
 try:
     from cookie_interceptor import CookieInterceptor
 
-    db = DatabaseHandler("database/test_browser_privacy.db")
     interceptor = CookieInterceptor(db, config)
 
     # Test blocking decision
@@ -113,7 +109,6 @@ try:
     stats = interceptor.get_stats()
     assert isinstance(stats, dict), "Stats should be a dict"
 
-    db.close()
     print("      ✅ PASS: Cookie interceptor working")
 except Exception as e:
     print(f"      ❌ FAIL: {e}")
@@ -127,7 +122,6 @@ print("[5/6] Testing traffic blocker...")
 try:
     from traffic_blocker import TrafficBlocker
 
-    db = DatabaseHandler("database/test_browser_privacy.db")
     blocker = TrafficBlocker(db, config)
 
     # Test pattern matching
@@ -139,11 +133,22 @@ try:
     should_block, reason = blocker.should_block_domain("localhost")
     assert should_block == False, "Should not block whitelisted domain"
 
+    # Test regex patterns with inline flags
+    flagged = TrafficBlocker(db, {"blocking": {"block_patterns": ["(?i)tracker", "^ads[0-9]+\\."]}})
+    assert flagged.match_block_pattern("Tracker.example.com") == "(?i)tracker", "Should match inline-flag pattern"
+    assert flagged.match_block_pattern("ads1.example.com") == "^ads[0-9]+\\.", "Should match regex pattern"
+    assert flagged.match_block_pattern("example.com") is None, "Should not match unrelated domain"
+
+    # "(?x)" must not leak into the other regexes: "ad s[0-9]" keeps its space
+    verbose = TrafficBlocker(db, {"blocking": {"block_patterns": ["ad s[0-9]", "(?x)zz"]}})
+    assert verbose.match_block_pattern("ads1.example.com") is None, "Verbose flag leaked into other patterns"
+    assert verbose.match_block_pattern("ad s1") == "ad s[0-9]", "Should match pattern with a space"
+    assert verbose.match_block_pattern("zz.example.com") == "(?x)zz", "Should match verbose pattern"
+
     # Test export
     blocklist = blocker.export_blocklist(format="text")
     assert blocklist is not None, "Failed to export blocklist"
 
-    db.close()
     print("      ✅ PASS: Traffic blocker working")
 except Exception as e:
     print(f"      ❌ FAIL: {e}")
@@ -155,8 +160,6 @@ except Exception as e:
 # Test 6: Integration
 print("[6/6] Testing integration...")
 try:
-    db = DatabaseHandler("database/test_browser_privacy.db")
-
     # Add some test data
     db.add_tracking_domain("tracker1.com", "test")
     db.add_tracking_domain("tracker2.com", "test")
@@ -164,6 +167,7 @@ try:
 
     # Log some activity
     db.log_cookie_traffic("tracker1.com", "test_cookie", "value", "10.0.0.1", "http://example.com", True)
+    db.flush()
 
     # Get stats
     stats = db.get_statistics()
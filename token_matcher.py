@@ -0,0 +1,81 @@
+# ==============================================================================
+# file_id: SOM-SCR-0015-v1.0.0
+# name: token_matcher.py
+# description: Case-insensitive multi-token substring matcher
+# project_id: BROWSER-MIXER-ANON
+# category: script
+# tags: [privacy, matching, performance]
+# created: 2025-01-22
+# modified: 2025-01-22
+# version: 1.0.0
+# agent_id: AGENT-PRIME-001
+# execution: Imported by cookie_interceptor.py
+# ==============================================================================
+
+import re
+
+try:
+    import ahocorasick
+except ImportError:  # pragma: no cover - optional C extension
+    ahocorasick = None
+
+
+class TokenMatcher:
+    """Finds the first of many tokens occurring anywhere in a string
+
+    Uses a pyahocorasick automaton when available, so the cost per lookup
+    depends on the input length rather than the number of tokens. Falls back
+    to a single compiled regex alternation otherwise.
+    """
+
+    def __init__(self, tokens=()):
+        self.tokens = []
+        self._automaton = None
+        self._regex = None
+        self.extend(tokens)
+
+    def extend(self, tokens):
+        """Add tokens and rebuild the matcher"""
+        for token in tokens:
+            token = token.lower()
+            if token and token not in self.tokens:
+                self.tokens.append(token)
+        self._build()
+
+    def add(self, token):
+        """Add a single token and rebuild the matcher"""
+        self.extend((token,))
+
+    def _build(self):
+        """Compile the current token list"""
+        if not self.tokens:
+            self._automaton = None
+            self._regex = None
+            return
+
+        if ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for token in self.tokens:
+                automaton.add_word(token, token)
+            automaton.make_automaton()
+            self._automaton = automaton
+        else:
+            self._regex = re.compile("|".join(map(re.escape, self.tokens)))
+
+    def search(self, text):
+        """Return the first token found in text, or None"""
+        return self.search_lower(text.lower())
+
+    def search_lower(self, text):
+        """Like search(), for text the caller has already lowercased"""
+        if self._automaton is not None:
+            for _, token in self._automaton.iter(text):
+                return token
+            return None
+        if self._regex is not None:
+            match = self._regex.search(text)
+            return match.group(0) if match else None
+        return None
+
+    def __len__(self):
+        return len(self.tokens)
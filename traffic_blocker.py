@@ -12,57 +12,173 @@
 # execution: Imported by privacy_proxy.py
 # ==============================================================================
 
+from functools import lru_cache
 import logging
 import re
-from urllib.parse import urlparse
+import sys
+
+from domain_utils import extract_domain_from_url
+from token_matcher import TokenMatcher
 
 logger = logging.getLogger(__name__)
 
+# Local addresses are never blocked
+_LOCAL_IPS = frozenset({"127.0.0.1", "::1", "localhost", "0.0.0.0"})
+
+# Distinct domains whose pattern-match result is remembered per blocker
+PATTERN_CACHE_SIZE = 4096
+
+# ".*literal.*" block patterns, where the literal is word characters, hyphens
+# and escaped punctuation only; these are plain substring tests
+SUBSTRING_PATTERN = re.compile(r"\.\*((?:[\w-]|\\[^\w])+)\.\*")
+
+# Plain domain entries such as "doubleclick.net" or "^ads\.example\.com$";
+# a dot is taken literally. With "$" they match one domain exactly, without
+# it any domain starting with them
+LITERAL_PATTERN = re.compile(r"\^?((?:[\w.-]|\\[^\w])+)(\$?)")
+
+# Inline global flags such as "(?i)" or "(?x)"; these apply to a whole
+# expression, so a pattern using them cannot sit inside the combined regex
+GLOBAL_FLAGS = re.compile(r"\(\?[aiLmsux]+\)")
+
 
 class TrafficBlocker:
     """Blocks traffic to/from tracking IPs and domains"""
 
     def __init__(self, db_handler, config):
         self.db = db_handler
-        self.config = config
         self.blocked_requests = 0
         self.allowed_requests = 0
 
+        # Patterns are fixed until the next reload_config(), so their verdict
+        # per domain can be cached; whitelist and blocklist changes still take
+        # effect through the database lookups that run before this step.
+        # cache_info() reports the hit rate
+        self.match_block_pattern = lru_cache(maxsize=PATTERN_CACHE_SIZE)(self.match_block_pattern)
+
+        self.reload_config(config)
+
+    def reload_config(self, config):
+        """Apply a (new) configuration to the blocker"""
+        self.config = config
+        blocking = config.get("blocking", {})
+
+        # Read once here rather than on every request
+        self.auto_block = bool(blocking.get("auto_block", True))
+
         # Load block patterns from config
-        self.block_patterns = config.get("blocking", {}).get("block_patterns", [])
+        self.block_patterns = blocking.get("block_patterns", [])
 
         # Compile regex patterns for efficiency
         self.compiled_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in self.block_patterns]
 
-    def should_block_domain(self, domain):
+        # Literal domains become set and prefix lookups, substring patterns
+        # go into one multi-token matcher (Aho-Corasick when pyahocorasick is
+        # installed); the rest stay regexes
+        self.exact_patterns = {}
+        self.prefix_patterns = {}
+        self.substring_patterns = {}
+        self.regex_patterns = []
+        for pattern, compiled in zip(self.block_patterns, self.compiled_patterns):
+            literal = SUBSTRING_PATTERN.fullmatch(pattern)
+            if literal:
+                token = re.sub(r"\\(.)", r"\1", literal.group(1)).lower()
+                self.substring_patterns.setdefault(token, pattern)
+                continue
+            literal = LITERAL_PATTERN.fullmatch(pattern)
+            if literal:
+                token = re.sub(r"\\(.)", r"\1", literal.group(1)).lower()
+                target = self.exact_patterns if literal.group(2) else self.prefix_patterns
+                target.setdefault(token, pattern)
+                continue
+            self.regex_patterns.append((pattern, compiled))
+        self.prefixes = tuple(self.prefix_patterns)
+        self.substring_matcher = TokenMatcher(self.substring_patterns)
+
+        # The remaining regexes as one alternation, so a single regex call
+        # checks them all; the named group that matched identifies the pattern.
+        # Patterns with groups of their own would have their numbering
+        # shifted, and inline global flags are an error mid-expression (3.11+)
+        # or silently apply to every alternative (3.10), so those are matched
+        # one by one
+        base_flags = re.compile("", re.IGNORECASE).flags
+        self.combined_patterns = []
+        self.separate_patterns = []
+        for pattern, compiled in self.regex_patterns:
+            if compiled.groups or compiled.flags != base_flags or GLOBAL_FLAGS.search(pattern):
+                self.separate_patterns.append((pattern, compiled))
+            else:
+                self.combined_patterns.append(pattern)
+        self.combined_pattern = None
+        if self.combined_patterns:
+            try:
+                self.combined_pattern = re.compile(
+                    "|".join(f"(?P<p{i}>{pattern})" for i, pattern in enumerate(self.combined_patterns)),
+                    re.IGNORECASE
+                )
+            except re.error:
+                self.combined_patterns = []
+                self.separate_patterns = list(self.regex_patterns)
+
+        self.match_block_pattern.cache_clear()
+
+    def should_block_domain(self, domain: str) -> tuple[bool, str | None]:
         """Determine if domain should be blocked"""
 
-        # Check whitelist first
-        if self.db.is_whitelisted(domain):
-            logger.debug(f"Domain {domain} is whitelisted")
+        # Whitelist first, then the database blocklist, in one lookup
+        status = self.db.classify_domain(domain)
+        if status == "white":
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Domain {domain} is whitelisted")
             return False, None
-
-        # Check if explicitly blocked in database
-        if self.db.is_domain_blocked(domain):
+        if status == "block":
             return True, "database_blocklist"
 
         # Check against patterns
-        for i, pattern in enumerate(self.compiled_patterns):
-            if pattern.match(domain):
-                logger.debug(f"Domain {domain} matches block pattern: {self.block_patterns[i]}")
-                # Add to database for future quick lookup
-                self.db.add_tracking_domain(domain, "pattern-match")
-                return True, f"pattern: {self.block_patterns[i]}"
+        pattern = self.match_block_pattern(domain)
+        if pattern is not None:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Domain {domain} matches block pattern: {pattern}")
+            # Add to database for future quick lookup; the hit is counted by
+            # the writer thread rather than committed here
+            self.db.add_tracking_domains_many(((domain, "pattern-match"),))
+            return True, f"pattern: {pattern}"
 
         return False, None
 
-    def should_block_ip(self, ip_address):
+    def match_block_pattern(self, domain: str) -> str | None:
+        """Return a block pattern matching domain, or None"""
+        domain_lower = domain.lower()
+        pattern = self.exact_patterns.get(domain_lower)
+        if pattern is not None:
+            return pattern
+
+        if self.prefixes and domain_lower.startswith(self.prefixes):
+            for prefix in self.prefixes:
+                if domain_lower.startswith(prefix):
+                    return self.prefix_patterns[prefix]
+
+        token = self.substring_matcher.search_lower(domain_lower)
+        if token is not None:
+            return self.substring_patterns[token]
+
+        if self.combined_pattern is not None:
+            match = self.combined_pattern.match(domain)
+            if match:
+                return self.combined_patterns[int(match.lastgroup[1:])]
+
+        for pattern, compiled in self.separate_patterns:
+            if compiled.match(domain):
+                return pattern
+        return None
+
+    def should_block_ip(self, ip_address: str | None) -> tuple[bool, str | None]:
         """Determine if IP should be blocked"""
         if not ip_address:
             return False, None
 
         # Skip localhost
-        if ip_address in ["127.0.0.1", "::1", "localhost"]:
+        if ip_address in _LOCAL_IPS:
             return False, None
 
         # Check if explicitly blocked in database
@@ -71,24 +187,23 @@ class TrafficBlocker:
 
         return False, None
 
-    def extract_domain_from_url(self, url):
-        """Extract domain from URL"""
-        try:
-            parsed = urlparse(url)
-            return parsed.netloc or parsed.path.split("/")[0]
-        except Exception as e:
-            logger.error(f"Error extracting domain from {url}: {e}")
-            return url
+    def extract_domain_from_url(self, url: str) -> str:
+        """Extract domain from URL, without user info or port"""
+        return extract_domain_from_url(url)
+
+    def process_request(self, flow, domain: str | None = None) -> bool:
+        """Process request and block if necessary
 
-    def process_request(self, flow):
-        """Process request and block if necessary"""
+        domain: the request's domain, when the caller has already extracted it
+        """
         try:
             url = flow.request.pretty_url
-            domain = self.extract_domain_from_url(url)
+            if domain is None:
+                domain = self.extract_domain_from_url(url)
             ip_address = flow.server_conn.address[0] if flow.server_conn else None
 
             # Check if should block
-            if not self.config.get("blocking", {}).get("auto_block", True):
+            if not self.auto_block:
                 self.allowed_requests += 1
                 return False  # Blocking disabled
 
@@ -104,7 +219,14 @@ class TrafficBlocker:
 
             if should_block:
                 self.blocked_requests += 1
-                logger.warning(f"BLOCKED: {flow.request.method} {url} (reason: {block_reason})")
+                # The few distinct reasons repeat across many requests;
+                # interned, the queued log rows share one string each
+                block_reason = sys.intern(block_reason)
+                if logger.isEnabledFor(logging.WARNING):
+                    logger.warning(f"BLOCKED: {flow.request.method} {url} (reason: {block_reason})")
+
+                # Kill the connection before anything else, then queue the log row
+                flow.kill()
 
                 # Log to database
                 fingerprint_id = getattr(flow, "fingerprint_id", None)
@@ -117,9 +239,6 @@ class TrafficBlocker:
                     blocked=True,
                     block_reason=block_reason,
                 )
-
-                # Kill the connection
-                flow.kill()
                 return True
 
             else:
@@ -149,37 +268,51 @@ class TrafficBlocker:
     def get_blocklist_stats(self):
         """Get blocklist statistics"""
         return {
-            "blocked_domains": len(self.db.get_blocked_domains()),
-            "blocked_ips": len(self.db.get_blocked_ips()),
+            "blocked_domains": self.db.count_blocked_domains(),
+            "blocked_ips": self.db.count_blocked_ips(),
             "blocked_requests": self.blocked_requests,
             "allowed_requests": self.allowed_requests,
         }
 
+    def iter_blocklist(self, format="text"):
+        """Yield the blocklist line by line in the given format
+
+        "list" yields bare domains then IPs, one per line.
+        """
+        if format not in ("text", "hosts", "list"):
+            raise ValueError(f"Unknown blocklist format: {format}")
+
+        # One query streams domains then IPs, without building either list
+        entries = self.db.iter_blocklist()
+
+        if format == "hosts":
+            # /etc/hosts format
+            yield "# Privacy Proxy Blocklist\n"
+            for kind, value in entries:
+                if kind == "d":
+                    yield f"0.0.0.0 {value}\n"
+                    yield f"0.0.0.0 www.{value}\n"
+            return
+
+        ips_started = format != "text"
+        if format == "text":
+            yield "# Blocked Domains\n"
+        for kind, value in entries:
+            if kind == "i" and not ips_started:
+                ips_started = True
+                yield "\n# Blocked IPs\n"
+            yield f"{value}\n"
+        if not ips_started:
+            yield "\n# Blocked IPs\n"
+
     def export_blocklist(self, format="text"):
         """Export blocklist in various formats"""
         try:
-            domains = self.db.get_blocked_domains()
-            ips = self.db.get_blocked_ips()
-
-            if format == "text":
-                output = "# Blocked Domains\n"
-                for domain in domains:
-                    output += f"{domain}\n"
-                output += "\n# Blocked IPs\n"
-                for ip in ips:
-                    output += f"{ip}\n"
-                return output
-
-            elif format == "hosts":
-                # /etc/hosts format
-                output = "# Privacy Proxy Blocklist\n"
-                for domain in domains:
-                    output += f"0.0.0.0 {domain}\n"
-                    output += f"0.0.0.0 www.{domain}\n"
-                return output
-
-            elif format == "list":
-                return {"domains": domains, "ips": ips}
+            if format == "list":
+                return {"domains": self.db.get_blocked_domains(), "ips": self.db.get_blocked_ips()}
+
+            if format in ("text", "hosts"):
+                return "".join(self.iter_blocklist(format))
 
         except Exception as e:
             logger.error(f"Error exporting blocklist: {e}")